@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from aggregation import calendar_order, load_cube
+from attendance_cache import get_derived
+
+# ================================
+# Inverted Absence Index
+# ================================
+# Every A mark in the cube is one posting. Postings are kept twice, in CSR
+# form (a flat array plus per-key offsets):
+#
+#   by (date, subject): roll codes, ascending   -> "who bunked ML on 2025-10-01"
+#   by roll:            cell codes, ascending   -> "what did 23E51A6601 bunk"
+#
+# where a cell code is `date_position * n_subjects + subject_position`, with
+# dates in calendar order (see `calendar_order`). A query slices one key's
+# range, so it costs the size of the (page of the) result, not the size of
+# the log.
+
+BLOCK_STUDENTS = 4096    # students per np.nonzero pass while building
+
+
+class AbsenceIndex:
+    """Absences of one daily log, by (date, subject) and by roll number."""
+
+    def __init__(self, rolls, dates, subjects, cell_offsets, cell_rolls, roll_offsets, roll_cells, bitmaps):
+        self.rolls = rolls
+        self.dates = dates              # log labels, in calendar order
+        self.subjects = list(subjects)
+        self._date_position = {d: i for i, d in enumerate(dates.tolist())}
+        self.cell_offsets = cell_offsets
+        self.cell_rolls = cell_rolls
+        self.roll_offsets = roll_offsets
+        self.roll_cells = roll_cells
+        self.bitmaps = bitmaps          # dates x subjects x ceil(students / 8), packed
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.cell_offsets, self.cell_rolls, self.roll_offsets,
+                                      self.roll_cells, self.bitmaps))
+
+    def __len__(self):
+        return len(self.roll_cells)
+
+    # ----- key lookups -----
+    def _cell(self, date, subject):
+        d = self._date_position.get(str(date))
+        if d is None or subject not in self.subjects:
+            return None
+        return d * len(self.subjects) + self.subjects.index(subject)
+
+    def _roll(self, roll):
+        i = int(np.searchsorted(self.rolls, str(roll)))
+        if i < len(self.rolls) and self.rolls[i] == str(roll):
+            return i
+        return None
+
+    # ----- who bunked -----
+    def absentee_count(self, date, subject) -> int:
+        c = self._cell(date, subject)
+        return 0 if c is None else int(self.cell_offsets[c + 1] - self.cell_offsets[c])
+
+    def absentees(self, date, subject, offset: int = 0, limit=None) -> np.ndarray:
+        """Roll numbers marked A for `subject` on `date`, sorted; `offset`/`limit` page through them."""
+        c = self._cell(date, subject)
+        if c is None:
+            return self.rolls[:0]
+        lo, hi = int(self.cell_offsets[c]), int(self.cell_offsets[c + 1])
+        start = min(lo + offset, hi)
+        stop = hi if limit is None else min(start + limit, hi)
+        return self.rolls[self.cell_rolls[start:stop]]
+
+    def absent_bitmap(self, date, subject):
+        """Packed bitmap (np.packbits order over `rolls`) of absentees, or None for an unknown key."""
+        c = self._cell(date, subject)
+        if c is None:
+            return None
+        d, j = divmod(c, len(self.subjects))
+        return self.bitmaps[d, j]
+
+    # ----- what did a student bunk -----
+    def absence_count(self, roll) -> int:
+        i = self._roll(roll)
+        return 0 if i is None else int(self.roll_offsets[i + 1] - self.roll_offsets[i])
+
+    def student_absences(self, roll, offset: int = 0, limit=None) -> pd.DataFrame:
+        """(Date, Subject) of each A mark for `roll`, in date order; `offset`/`limit` page through them."""
+        i = self._roll(roll)
+        cells = self.roll_cells[:0]
+        if i is not None:
+            lo, hi = int(self.roll_offsets[i]), int(self.roll_offsets[i + 1])
+            start = min(lo + offset, hi)
+            stop = hi if limit is None else min(start + limit, hi)
+            cells = self.roll_cells[start:stop]
+        d, j = np.divmod(cells, len(self.subjects))
+        return pd.DataFrame({
+            'Date': self.dates.astype(object)[d],
+            'Subject': np.asarray(self.subjects, dtype=object)[j],
+        })
+
+
+def build_absence_index(cube) -> AbsenceIndex:
+    n_students, n_dates, n_subjects = cube.shape
+    date_order = calendar_order(cube.dates)
+    if np.array_equal(date_order, np.arange(n_dates)):
+        date_order = slice(None)    # already in calendar order: no copies
+    roll_parts, cell_parts = [], []
+    bitmaps = np.zeros((n_dates, n_subjects, (n_students + 7) // 8), dtype=np.uint8)
+    for start in range(0, n_students, BLOCK_STUDENTS):
+        stop = min(start + BLOCK_STUDENTS, n_students)
+        absent = cube.recorded[start:stop, date_order] & ~cube.present[start:stop, date_order]
+        s, d, j = np.nonzero(absent)                # sorted by student, then cell
+        roll_parts.append((s + start).astype(np.int32))
+        cell_parts.append((d * n_subjects + j).astype(np.int32))
+        # Blocks are a multiple of 8 students, so each lands on whole bytes.
+        bitmaps[:, :, start // 8:(stop + 7) // 8] = np.packbits(absent, axis=0).transpose(1, 2, 0)
+
+    rolls_flat = np.concatenate(roll_parts) if roll_parts else np.zeros(0, dtype=np.int32)
+    cells_flat = np.concatenate(cell_parts) if cell_parts else np.zeros(0, dtype=np.int32)
+
+    roll_offsets = np.zeros(n_students + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rolls_flat, minlength=n_students), out=roll_offsets[1:])
+
+    # A stable sort by cell keeps each cell's rolls in ascending order.
+    order = np.argsort(cells_flat, kind='stable')
+    cell_offsets = np.zeros(n_dates * n_subjects + 1, dtype=np.int64)
+    np.cumsum(np.bincount(cells_flat, minlength=n_dates * n_subjects), out=cell_offsets[1:])
+
+    return AbsenceIndex(cube.rolls, np.asarray(cube.dates)[date_order], cube.subjects,
+                        cell_offsets, rolls_flat[order], roll_offsets, cells_flat, bitmaps)
+
+
+def load_absence_index(path) -> AbsenceIndex:
+    """Absence index for the daily log at `path`, built once per data version."""
+    return get_derived(path, 'absence_index', lambda: build_absence_index(load_cube(path)))
@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+
+from attendance_cache import get_derived, load_daily_log
+from columnar import BLANK, PRESENT, load_sidecar, parse_dates
+
+DETENTION_THRESHOLD = 75
+
+
+# ================================
+# Student x Date x Subject Cube
+# ================================
+class AttendanceCube:
+    """
+    The daily P/A log as dense boolean arrays.
+
+    `present[s, d, j]` is True when student `rolls[s]` was marked P for
+    `subjects[j]` on `dates[d]`; `recorded` is True wherever the log has any
+    mark at all. Rolls and dates (the labels as written in the log) are
+    sorted as strings, matching `groupby` / `sorted()`, whichever builder
+    made the cube. Use `calendar_order` where real date order matters.
+
+    A class (date, subject) counts as held when anyone has a mark for it, so
+    every student is out of the same total; a blank cell on a held class
+    counts as not attended. The running totals and the forecast count held
+    classes the same way.
+    """
+
+    def __init__(self, rolls, dates, subjects, present, recorded):
+        self.rolls = rolls
+        self.dates = dates
+        self.subjects = list(subjects)
+        self.present = present
+        self.recorded = recorded
+
+    @property
+    def shape(self):
+        return self.present.shape
+
+    @property
+    def absent(self):
+        return self.recorded & ~self.present
+
+    @property
+    def held(self):
+        """dates x subjects: True where the class was held."""
+        return self.recorded.any(axis=0)
+
+    @property
+    def nbytes(self) -> int:
+        return self.present.nbytes + self.recorded.nbytes
+
+    def roll_position(self, roll):
+        """Index of `roll` in `rolls`, or None if it is not in the log."""
+        i = int(np.searchsorted(self.rolls, roll))
+        if i < len(self.rolls) and self.rolls[i] == roll:
+            return i
+        return None
+
+
+def _fill_cube(roll_code, rolls, date_code, dates, subjects, is_p, is_marked):
+    shape = (len(rolls), len(dates), len(subjects))
+    present = np.zeros(shape, dtype=bool)
+    recorded = np.zeros(shape, dtype=bool)
+    # Duplicate (Date, Roll.No) rows collapse onto one cell; the last one wins.
+    present[roll_code, date_code] = is_p
+    recorded[roll_code, date_code] = is_marked
+    return AttendanceCube(rolls, dates, subjects, present, recorded)
+
+
+def cube_from_frame(df: pd.DataFrame) -> AttendanceCube:
+    subjects = [c for c in df.columns if c not in ('Date', 'Roll.No')]
+    roll_code, rolls = pd.factorize(df['Roll.No'].astype(str), sort=True)
+    date_code, dates = pd.factorize(df['Date'].astype(str), sort=True)
+    values = df[subjects]
+    return _fill_cube(
+        roll_code, np.asarray(rolls, dtype=object).astype('U'),
+        date_code, np.asarray(dates, dtype=object).astype('U'),
+        subjects,
+        (values == 'P').to_numpy(dtype=bool),
+        values.notna().to_numpy(dtype=bool),
+    )
+
+
+def _sorted_codes(values):
+    """(rank of each value in sorted order, the sorted values)."""
+    order = np.argsort(values, kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return rank, np.asarray(values)[order]
+
+
+def cube_from_columnar(log) -> AttendanceCube:
+    roll_rank, rolls = _sorted_codes(log.rolls)
+    # The sidecar keeps dates by day number; the cube orders them by label.
+    date_rank, dates = _sorted_codes(log.date_labels)
+    grid = np.asarray(log.grid)
+    return _fill_cube(
+        roll_rank[log.roll_code], rolls,
+        date_rank[np.searchsorted(log.date_days, log.day)], dates,
+        log.subjects,
+        grid == PRESENT,
+        grid != BLANK,
+    )
+
+
+def calendar_order(dates) -> np.ndarray:
+    """Positions of `dates` (log labels) in calendar order; label order if any doesn't parse."""
+    days = parse_dates(dates)
+    if days is None:
+        return np.arange(len(dates))
+    return np.argsort(days, kind='stable')
+
+
+def load_cube(path) -> AttendanceCube:
+    """Cube for the daily log at `path`, built once per data version."""
+    def build():
+        log = load_sidecar(path)
+        if log is not None:
+            return cube_from_columnar(log)
+        return cube_from_frame(load_daily_log(path))
+    return get_derived(path, 'cube', build)
+
+
+# ================================
+# Reductions
+# ================================
+def student_summary(cube: AttendanceCube, threshold: float = DETENTION_THRESHOLD) -> pd.DataFrame:
+    """Per-student Classes_Attended / Percent / Detained, as in the faculty view."""
+    attended = cube.present.sum(axis=(1, 2))
+    total = int(cube.held.sum())
+    percent = attended / total * 100 if total else np.zeros(len(attended))
+    return pd.DataFrame({
+        'Roll.No': cube.rolls.astype(object),
+        'Classes_Attended': attended,
+        'Percent': percent,
+        'Detained': (percent < threshold).astype(int),
+    })
+
+
+def subject_summary(cube: AttendanceCube) -> pd.DataFrame:
+    attended = cube.present.sum(axis=(0, 1))
+    total = cube.shape[0] * cube.held.sum(axis=0)
+    return pd.DataFrame({
+        'Subject': cube.subjects,
+        'Classes_Attended': attended,
+        'Percent': np.divide(attended * 100.0, total, out=np.zeros(len(attended)), where=total > 0),
+    })
+
+
+def date_summary(cube: AttendanceCube) -> pd.DataFrame:
+    attended = cube.present.sum(axis=(0, 2))
+    total = cube.shape[0] * cube.held.sum(axis=1)
+    return pd.DataFrame({
+        'Date': cube.dates.astype(object),
+        'Classes_Attended': attended,
+        'Percent': np.divide(attended * 100.0, total, out=np.zeros(len(attended)), where=total > 0),
+    })
+
+
+def student_subject_summary(cube: AttendanceCube, threshold: float = DETENTION_THRESHOLD) -> pd.DataFrame:
+    """Long-form (Roll.No, Subject) table of attended/held classes and detention flags."""
+    n_students, n_dates, n_subjects = cube.shape
+    attended = cube.present.sum(axis=1)    # students x subjects
+    held = cube.held.sum(axis=0)           # subjects
+    percent = np.divide(attended * 100.0, held, out=np.zeros(attended.shape), where=held > 0)
+    return pd.DataFrame({
+        'Roll.No': np.repeat(cube.rolls.astype(object), n_subjects),
+        'Subject': np.tile(np.asarray(cube.subjects, dtype=object), n_students),
+        'Attended': attended.ravel(),
+        'Held': np.tile(held, n_students),
+        'Percent': percent.ravel(),
+        'Detained': (percent < threshold).astype(int).ravel(),
+    })
+
+
+def student_record(cube: AttendanceCube, roll):
+    """Per-subject attended/held classes for one student, or None if not in the log."""
+    i = cube.roll_position(str(roll))
+    if i is None:
+        return None
+    attended = cube.present[i].sum(axis=0)
+    held = cube.held.sum(axis=0)
+    return pd.DataFrame({
+        'Subject': cube.subjects,
+        'Attended': attended,
+        'Held': held,
+        'Percent': np.divide(attended * 100.0, held, out=np.zeros(len(attended)), where=held > 0),
+    })
+
+
+def load_student_summary(path) -> pd.DataFrame:
+    return get_derived(path, 'student_summary', lambda: student_summary(load_cube(path))).copy(deep=False)
+
+
+def load_student_subject_summary(path) -> pd.DataFrame:
+    return get_derived(
+        path, 'student_subject_summary', lambda: student_subject_summary(load_cube(path))
+    ).copy(deep=False)
@@ -0,0 +1,194 @@
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from columnar import load_sidecar, write_sidecar
+from helpers import read_attendance
+
+
+# ================================
+# Data Versions
+# ================================
+def file_version(path):
+    """Return a (path, mtime, size) key identifying the current contents of a file."""
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _estimate_bytes(value) -> int:
+    """Rough in-memory size of a cached value, used for the size budget."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, tuple):
+        return sum(_estimate_bytes(v) for v in value)
+    nbytes = getattr(value, 'nbytes', None)
+    if nbytes is not None:
+        return int(nbytes)
+    return 0
+
+
+# ================================
+# Process-wide LRU Cache
+# ================================
+class AttendanceCache:
+    """
+    Thread-safe LRU cache shared by every Streamlit session in the process.
+
+    Entries are keyed by a data version (see `file_version`) plus a name, so an
+    overwritten file simply produces new keys and the old entries age out.
+    Eviction happens when either `max_entries` or `max_bytes` is exceeded.
+    """
+
+    def __init__(self, max_entries: int = 32, max_bytes: int = 512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # key -> (value, nbytes)
+        self._building = {}             # key -> lock held while the value is built
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, build):
+        """Return the cached value for `key`, calling `build()` once on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            build_lock = self._building.setdefault(key, threading.Lock())
+
+        # Only one session builds a given key; the rest wait and then hit.
+        with build_lock:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key][0]
+                self.misses += 1
+            try:
+                value = build()
+            except BaseException:
+                with self._lock:
+                    self._building.pop(key, None)
+                raise
+            nbytes = _estimate_bytes(value)
+            # Insert before dropping the build lock, so a session arriving in
+            # between finds the value instead of starting a second build.
+            with self._lock:
+                self._insert(key, value, nbytes)
+                self._building.pop(key, None)
+            return value
+
+    def put(self, key, value):
+        nbytes = _estimate_bytes(value)
+        with self._lock:
+            self._insert(key, value, nbytes)
+
+    def _insert(self, key, value, nbytes):
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (value, nbytes)
+        self._bytes += nbytes
+        self._evict()
+
+    def _evict(self):
+        # Always keep the most recent entry, even if it alone exceeds the budget.
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self._bytes -= nbytes
+            self.evictions += 1
+
+    def invalidate(self, predicate) -> int:
+        """Drop every entry whose key satisfies `predicate`. Returns how many were dropped."""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._bytes -= self._entries.pop(key)[1]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+
+attendance_cache = AttendanceCache()
+
+
+# ================================
+# Cached Loaders
+# ================================
+def get_derived(path, name, build):
+    """
+    Cache `build()` under the current version of `path`.
+
+    Used for anything computed from a data file (cubes, summaries, indexes) so
+    it is rebuilt exactly once per data version and shared by all sessions.
+    """
+    return attendance_cache.get(file_version(path) + (name,), build)
+
+
+def _read_daily_log(path) -> pd.DataFrame:
+    log = load_sidecar(path)
+    if log is not None:
+        return log.to_frame()
+
+    # Sidecar missing or stale: parse the CSV and refresh it for next time.
+    df = pd.read_csv(path)
+    df.columns = df.columns.str.strip()
+    try:
+        write_sidecar(df, path)
+    except OSError:
+        pass
+    return df
+
+
+def load_daily_log_head(path, rows: int = 10) -> pd.DataFrame:
+    """The first `rows` rows of a daily log with stripped columns, e.g. for a preview."""
+    def build():
+        df = pd.read_csv(path, nrows=rows)
+        df.columns = df.columns.str.strip()
+        return df
+    return get_derived(path, ('daily_log_head', rows), build).copy(deep=False)
+
+
+def load_attendance(path) -> pd.DataFrame:
+    """
+    Summary-layout attendance (e.g. data/attendance.csv) via `read_attendance`.
+
+    The returned frame shares its data with every other session: add columns
+    freely, but never modify values in place.
+    """
+    key = file_version(path) + ('attendance',)
+    df = attendance_cache.get(key, lambda: read_attendance(path))
+    return df.copy(deep=False)
+
+
+def load_daily_log(path) -> pd.DataFrame:
+    """
+    Daily P/A log (e.g. data/faculty_attendance_20days.csv) with stripped columns,
+    served from the columnar sidecar when it is fresh.
+
+    Same sharing rules as `load_attendance`.
+    """
+    key = file_version(path) + ('daily_log',)
+    df = attendance_cache.get(key, lambda: _read_daily_log(path))
+    return df.copy(deep=False)
@@ -1,9 +1,12 @@
 import streamlit as st
-import pandas as pd
-import os
-from helpers import hash_password, check_login, read_attendance
+from helpers import hash_password, check_login
+from roll_index import RollIndex, load_roll_index
+from running_totals import load_summary_view
+from user_store import CsvUserStore
+from instrumentation import span
+from snapshots import pinned
 
-def login(users_df):
+def login(users):
     st.subheader("🔑 Login")
     st.caption("👉 Students use your Roll.No (e.g., 23E51A6601). Faculty can use your registered username.")
 
@@ -11,7 +14,8 @@ def login(users_df):
     password = st.text_input("Password", type="password", key="login_pass")
 
     if st.button("Login"):
-        role = check_login(username, password, users_df)
+        with span('login.check_login'):
+            role = check_login(username, password, users)
 
         if not role:
             st.error("Invalid username or password.")
@@ -21,20 +25,26 @@ def login(users_df):
         # Student Login Validation
         # ===========================
         if role == 'student':
-            data_file = 'data/attendance.csv'
-            if os.path.exists(data_file):
-                try:
-                    df = read_attendance(data_file)
-                    rolls = df['Roll.No'].astype(str).str.strip().values
-                except Exception:
-                    rolls = []
+            data_file = pinned('data/attendance.csv')
+            log_file = pinned('data/faculty_attendance_20days.csv')
+            if data_file is not None or log_file is not None:
+                rolls = RollIndex([])
+                if data_file is not None:
+                    with span('login.roll_index') as s:
+                        try:
+                            rolls = load_roll_index(data_file)
+                        except Exception:
+                            pass
+                        s.rows = len(rolls)
+                # Students in the daily log are known even before a summary file is exported.
+                in_log = log_file is not None and username in load_summary_view(log_file)
 
-                if str(username).strip() not in rolls:
+                if username not in rolls and not in_log:
                     st.warning("Your Roll.No is not found in the attendance records.")
                     st.info("Make sure you use your correct Roll.No (e.g., 23E51A6601).")
                     if len(rolls) > 0:
                         st.caption("Here are a few valid Roll.No examples:")
-                        st.write(list(rolls[:10]))
+                        st.write(rolls.sample(10))
                     return
             else:
                 st.warning("⚠️ No attendance data found yet. Contact your faculty.")
@@ -60,7 +70,7 @@ def login(users_df):
             pass
 
 
-def register(users_file):
+def register(users):
     st.subheader("📝 Register New Account")
     st.caption("👉 Students must enter Roll.No as username. Faculty can use any unique ID.")
 
@@ -70,12 +80,12 @@ def register(users_file):
 
     if st.button("Register"):
         hashed = hash_password(password)
-        df = pd.read_csv(users_file)
+        if isinstance(users, str):
+            users = CsvUserStore(users)
 
-        if username in df['username'].astype(str).values:
+        with span('register.add'):
+            added = users.add(str(username), hashed, role)
+        if not added:
             st.error("Username already exists!")
         else:
-            new_user = pd.DataFrame([[str(username), hashed, role]], columns=['username','password','role'])
-            df = pd.concat([df, new_user], ignore_index=True)
-            df.to_csv(users_file, index=False)
             st.success("✅ Registration successful! Please login.")
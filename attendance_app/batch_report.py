@@ -0,0 +1,186 @@
+"""
+Headless detention report for a directory of section attendance CSVs.
+
+Each CSV is processed in a worker process with the same helpers the
+dashboards use (header sniffing, daily-log aggregation, detention flags and
+the "classes needed" formula). Results are streamed to a single CSV or
+Parquet file as sections finish, so only the sections in flight are held in
+memory.
+
+Usage (from attendance_app/):
+    python batch_report.py SECTIONS_DIR -o detention_report.csv
+    python batch_report.py SECTIONS_DIR -o detention_report.parquet --workers 8
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from aggregation import DETENTION_THRESHOLD, cube_from_frame, student_summary
+from helpers import classes_needed, read_attendance
+
+REPORT_COLUMNS = ['Section', 'Roll.No', 'Attended', 'Total', 'Percent', 'Detained', 'Classes_Needed']
+
+
+# ================================
+# Per-Section Worker
+# ================================
+def section_report(path, threshold: float = DETENTION_THRESHOLD):
+    """
+    Detention report for one section file (daily P/A log or summary layout).
+
+    Returns:
+        (report DataFrame, number of input rows)
+    """
+    df = read_attendance(path)
+    section = os.path.splitext(os.path.basename(path))[0]
+
+    if 'Date' in df.columns:
+        cube = cube_from_frame(df)
+        summary = student_summary(cube, threshold)
+        attended = summary['Classes_Attended']
+        total = int(cube.held.sum())
+        percent = summary['Percent']
+    elif {'Total', 'Percent'} <= set(df.columns):
+        # Summary layout only has a rounded percentage; attended is rebuilt from it.
+        summary = df
+        total = pd.to_numeric(df['Total'], errors='coerce')
+        percent = pd.to_numeric(df['Percent'], errors='coerce')
+        attended = (percent / 100 * total).round()
+    else:
+        raise ValueError("neither a daily log (Date column) nor a summary (Total/Percent columns)")
+
+    report = pd.DataFrame({
+        'Section': section,
+        'Roll.No': summary['Roll.No'].astype(str).str.strip(),
+        'Attended': attended,
+        'Total': total,
+        'Percent': percent.round(2),
+        'Detained': (percent < threshold).astype(int),
+        'Classes_Needed': classes_needed(np.nan_to_num(np.asarray(attended, dtype=float)),
+                                         np.nan_to_num(np.asarray(total, dtype=float)), threshold),
+    }, columns=REPORT_COLUMNS)
+    return report, len(df)
+
+
+# ================================
+# Streaming Writers
+# ================================
+class CsvReportWriter:
+    def __init__(self, path):
+        self.path = path
+        self._header = True
+
+    def write(self, df: pd.DataFrame):
+        df.to_csv(self.path, mode='w' if self._header else 'a', header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        if self._header:    # nothing written: still leave a header-only file
+            pd.DataFrame(columns=REPORT_COLUMNS).to_csv(self.path, index=False)
+
+
+class ParquetReportWriter:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow (pip install pyarrow); use a .csv output instead.")
+        self._pa = pa
+        self._schema = pa.schema([
+            ('Section', pa.string()), ('Roll.No', pa.string()), ('Attended', pa.float64()),
+            ('Total', pa.float64()), ('Percent', pa.float64()), ('Detained', pa.int64()),
+            ('Classes_Needed', pa.int64()),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, df: pd.DataFrame):
+        df = df.astype({'Attended': float, 'Total': float, 'Percent': float,
+                        'Detained': 'int64', 'Classes_Needed': 'int64'})
+        self._writer.write_table(self._pa.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+
+    def close(self):
+        self._writer.close()
+
+
+def open_writer(path):
+    if path.endswith('.parquet'):
+        return ParquetReportWriter(path)
+    return CsvReportWriter(path)
+
+
+# ================================
+# Driver
+# ================================
+def run(paths, output, workers=None, threshold: float = DETENTION_THRESHOLD, log=sys.stderr) -> dict:
+    """Process `paths` in a process pool and stream the combined report to `output`."""
+    writer = open_writer(output)
+    stats = {'files': 0, 'failed': 0, 'rows': 0, 'students': 0, 'detained': 0}
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep a bounded number of sections in flight.
+        window = 2 * (workers or os.cpu_count() or 1)
+        pending = {}
+        queue = iter(paths)
+
+        def fill():
+            for path in queue:
+                pending[pool.submit(section_report, path, threshold)] = path
+                if len(pending) >= window:
+                    break
+
+        fill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    report, n_rows = future.result()
+                except Exception as e:
+                    stats['failed'] += 1
+                    print(f"skipped {path}: {e}", file=log)
+                    continue
+                writer.write(report)
+                stats['files'] += 1
+                stats['rows'] += n_rows
+                stats['students'] += len(report)
+                stats['detained'] += int(report['Detained'].sum())
+            fill()
+
+    writer.close()
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input_dir', help="directory of section attendance CSVs")
+    parser.add_argument('-o', '--output', default='detention_report.csv', help=".csv or .parquet")
+    parser.add_argument('--pattern', default='*.csv', help="glob for section files (default: *.csv)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--threshold', type=float, default=DETENTION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    paths = sorted(glob.glob(os.path.join(args.input_dir, args.pattern)))
+    if not paths:
+        print(f"No files matching {args.pattern} in {args.input_dir}", file=sys.stderr)
+        return 1
+
+    stats = run(paths, args.output, args.workers, args.threshold)
+    secs = max(stats['seconds'], 1e-9)
+    print(f"{stats['files']} files ({stats['failed']} failed), {stats['rows']} rows, "
+          f"{stats['students']} students, {stats['detained']} detained")
+    print(f"{secs:.2f}s  ·  {stats['files'] / secs:.1f} files/s  ·  {stats['rows'] / secs:,.0f} rows/s")
+    print(f"Report written to {args.output}")
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Synthetic attendance data at configurable scale.
+
+Writes, into OUT_DIR:
+  faculty_attendance.csv  daily P/A log (Date, Roll.No, subjects...), one row per student per day
+  attendance.csv          summary in the data/Attendance.csv layout: a report-period banner,
+                          the header row, and a Batch-N totals row before every batch
+  users.csv               auth/users.csv layout, one student per roll plus a few faculty
+
+Usage (from attendance_app/):
+    python benchmarks/generate.py OUT_DIR --students 3000 --days 180 --subjects 8
+"""
+import argparse
+import datetime as dt
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from helpers import hash_password  # noqa: E402
+
+SUBJECT_NAMES = ['ML', 'BEFA', 'DV', 'SE', 'ACD', 'IDS', 'OS', 'WT', 'DAA', 'CN',
+                 'DBMS', 'AI', 'CD', 'NLP', 'IOT', 'CC']
+DEFAULT_PASSWORD = '123456'
+
+
+def roll_numbers(n: int, prefix: str = '23E51A') -> np.ndarray:
+    return np.array([f"{prefix}{i:05d}" for i in range(1, n + 1)], dtype=object)
+
+
+def subject_names(n: int) -> list:
+    names = SUBJECT_NAMES[:n]
+    names += [f"SUB{i}" for i in range(len(names) + 1, n + 1)]
+    return names
+
+
+def school_days(days: int, start=dt.date(2025, 6, 2)) -> list:
+    """`days` weekdays starting at `start`, as YYYY-MM-DD strings."""
+    out, day = [], start
+    while len(out) < days:
+        if day.weekday() < 5:
+            out.append(day.isoformat())
+        day += dt.timedelta(days=1)
+    return out
+
+
+def student_rates(rng, n: int, n_subjects: int) -> np.ndarray:
+    """Per-(student, subject) attendance probability: most students high, a tail at risk."""
+    base = rng.beta(8, 1.6, size=(n, 1))
+    return np.clip(base + rng.normal(0, 0.05, size=(n, n_subjects)), 0.05, 0.99)
+
+
+def generate_daily_log(path, students: int, days: int, subjects: int, seed: int = 0):
+    """Write the daily log one day at a time, so memory stays at one day's rows."""
+    rng = np.random.default_rng(seed)
+    rolls = roll_numbers(students)
+    names = subject_names(subjects)
+    rates = student_rates(rng, students, subjects)
+    status = np.array(['A', 'P'], dtype=object)
+
+    for i, date in enumerate(school_days(days)):
+        present = rng.random((students, subjects)) < rates
+        day = pd.DataFrame(status[present.astype(np.int8)], columns=names)
+        day.insert(0, 'Roll.No', rolls)
+        day.insert(0, 'Date', date)
+        day.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+
+
+def generate_summary(path, students: int, subjects: int, seed: int = 0, batch_size: int = 60,
+                     classes_per_subject: int = 60):
+    """Write a summary file with the messy header and Batch-N totals rows of data/Attendance.csv."""
+    rng = np.random.default_rng(seed)
+    names = subject_names(subjects)
+    held = rng.integers(classes_per_subject // 2, classes_per_subject + 1, size=subjects)
+    attended = np.floor(student_rates(rng, students, subjects) * held).astype(int)
+    total_attended = attended.sum(axis=1)
+    percent = np.round(total_attended / held.sum() * 100, 2)
+    rolls = roll_numbers(students)
+
+    columns = ['Sl.No', 'Roll.No'] + names + ['Total', 'Percent']
+    with open(path, 'w', newline='') as f:
+        f.write(',ATTENDANCE REPORT FOR THE PERIOD OF 02/06/2025 - 15/11/2025' + ',' * (len(columns) - 2) + '\n')
+        f.write(','.join(columns) + '\n')
+        for b, start in enumerate(range(0, students, batch_size), start=1):
+            stop = min(start + batch_size, students)
+            f.write(','.join([f'Batch-{b}', ''] + [str(h) for h in held] + [str(held.sum()), '']) + '\n')
+            block = pd.DataFrame(attended[start:stop], columns=names)
+            block.insert(0, 'Roll.No', rolls[start:stop])
+            block.insert(0, 'Sl.No', np.arange(start + 1, stop + 1))
+            block['Total'] = total_attended[start:stop]
+            block['Percent'] = percent[start:stop]
+            block.to_csv(f, header=False, index=False)
+
+
+def generate_users(path, students: int, faculty: int = 5):
+    hashed = hash_password(DEFAULT_PASSWORD)
+    usernames = np.concatenate([roll_numbers(students), [f"faculty{i}" for i in range(1, faculty + 1)]])
+    roles = ['student'] * students + ['faculty'] * faculty
+    pd.DataFrame({'username': usernames, 'password': hashed, 'role': roles}).to_csv(path, index=False)
+
+
+def generate_all(out_dir, students: int, days: int, subjects: int, seed: int = 0) -> dict:
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {
+        'daily_log': os.path.join(out_dir, 'faculty_attendance.csv'),
+        'summary': os.path.join(out_dir, 'attendance.csv'),
+        'users': os.path.join(out_dir, 'users.csv'),
+    }
+    generate_daily_log(paths['daily_log'], students, days, subjects, seed)
+    generate_summary(paths['summary'], students, subjects, seed)
+    generate_users(paths['users'], students)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('out_dir')
+    parser.add_argument('--students', type=int, default=3000)
+    parser.add_argument('--days', type=int, default=180)
+    parser.add_argument('--subjects', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    paths = generate_all(args.out_dir, args.students, args.days, args.subjects, args.seed)
+    for name, path in paths.items():
+        print(f"{name:<10} {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
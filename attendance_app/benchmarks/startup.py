@@ -0,0 +1,147 @@
+"""
+Cold-start benchmark for the Streamlit app.
+
+Measures, each in a fresh interpreter:
+  * import time of every app module
+  * time to render the login page (main.py run headless via AppTest)
+  * which heavy libraries the login page pulled in
+
+and compares the results with benchmarks/startup_budget.json.
+
+Usage (from attendance_app/):
+    python benchmarks/startup.py              # check against the budget
+    python benchmarks/startup.py --update     # record current numbers as the budget
+    python benchmarks/startup.py --json out.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = os.path.join(APP_DIR, 'benchmarks', 'startup_budget.json')
+
+MODULES = [
+    'helpers', 'columnar', 'attendance_cache', 'user_store', 'roll_index', 'running_totals', 'auth',
+    'instrumentation', 'snapshots', 'precompute', 'aggregation', 'date_index', 'absence_index',
+    'streaks', 'forecast', 'projection', 'upload', 'ingest', 'charts', 'student_dashboard',
+    'faculty_dashboard', 'batch_report',
+]
+# Entry points, run rather than imported.
+NOT_IMPORTED = {'main'}
+# Libraries the login page must not import.
+HEAVY_LIBRARIES = ['matplotlib', 'plotly', 'sklearn']
+# Budgets get this much headroom when recorded with --update.
+HEADROOM = 2.0
+
+IMPORT_SNIPPET = """
+import time
+t = time.perf_counter()
+import {module}
+print(time.perf_counter() - t)
+"""
+
+LOGIN_SNIPPET = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({main!r}, default_timeout=120)
+# Streamlit's own imports don't count against the app.
+preloaded = set(sys.modules)
+t = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - t
+print(json.dumps({{
+    'seconds': elapsed,
+    'exceptions': [e.value for e in at.exception],
+    'heavy_modules': sorted(m for m in {heavy!r} if m in sys.modules and m not in preloaded),
+}}))
+"""
+
+
+def _run(snippet: str) -> str:
+    out = subprocess.run(
+        [sys.executable, '-c', snippet], cwd=APP_DIR, check=True,
+        capture_output=True, text=True,
+    )
+    return out.stdout.strip().splitlines()[-1]
+
+
+def measure(repeat: int = 5) -> dict:
+    results = {'modules': {}}
+    for module in MODULES:
+        times = [float(_run(IMPORT_SNIPPET.format(module=module))) for _ in range(repeat)]
+        results['modules'][module] = statistics.median(times)
+
+    runs = [json.loads(_run(LOGIN_SNIPPET.format(main=os.path.join(APP_DIR, 'main.py'),
+                                                 heavy=HEAVY_LIBRARIES)))
+            for _ in range(repeat)]
+    results['login_page'] = statistics.median(r['seconds'] for r in runs)
+    results['login_exceptions'] = runs[-1]['exceptions']
+    results['login_heavy_modules'] = runs[-1]['heavy_modules']
+    return results
+
+
+def unlisted_modules() -> list:
+    """App modules missing from MODULES (so their import time goes unchecked)."""
+    names = {os.path.splitext(n)[0] for n in os.listdir(APP_DIR) if n.endswith('.py')}
+    return sorted(names - set(MODULES) - NOT_IMPORTED)
+
+
+def check(results: dict, budget: dict) -> list:
+    """Return a list of human-readable budget violations."""
+    problems = [f"module {m} is not in MODULES; add it and run with --update" for m in unlisted_modules()]
+    if results['login_exceptions']:
+        problems.append(f"login page raised: {results['login_exceptions']}")
+    if results['login_heavy_modules']:
+        problems.append(f"login page imported {results['login_heavy_modules']}")
+    if results['login_page'] > budget.get('login_page', float('inf')):
+        problems.append(f"login page {results['login_page']:.3f}s > budget {budget['login_page']:.3f}s")
+    for module, seconds in results['modules'].items():
+        limit = budget.get('modules', {}).get(module)
+        if limit is None:
+            problems.append(f"import {module} has no budget; run with --update to record one")
+        elif seconds > limit:
+            problems.append(f"import {module} {seconds:.3f}s > budget {limit:.3f}s")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--update', action='store_true', help="write the budget file from this run")
+    parser.add_argument('--json', help="also write the raw results to this file")
+    args = parser.parse_args(argv)
+
+    results = measure(args.repeat)
+    print(f"{'login page':<32} {results['login_page']:.3f}s")
+    for module, seconds in results['modules'].items():
+        print(f"{'import ' + module:<32} {seconds:.3f}s")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.update:
+        budget = {
+            'login_page': round(results['login_page'] * HEADROOM, 3),
+            'modules': {m: round(s * HEADROOM, 3) for m, s in results['modules'].items()},
+        }
+        with open(BUDGET_FILE, 'w') as f:
+            json.dump(budget, f, indent=2)
+        print(f"Budget written to {BUDGET_FILE}")
+        return 0
+
+    if not os.path.exists(BUDGET_FILE):
+        print("No budget file; run with --update to create one.")
+        return 0
+    with open(BUDGET_FILE) as f:
+        problems = check(results, json.load(f))
+    for problem in problems:
+        print(f"OVER BUDGET: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
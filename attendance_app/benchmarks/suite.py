@@ -0,0 +1,225 @@
+"""
+Benchmark suite for the data paths behind the dashboards, on synthetic data.
+
+Generates a cohort with benchmarks/generate.py (or reuses one with
+--data-dir), times each case in-process and writes the results as JSON so runs
+can be compared across commits.
+
+Cases:
+  read_attendance        summary file with banner + Batch-N rows, cold layout cache
+  read_daily_log         daily P/A log CSV
+  check_login_{backend}  one login against a user store of the whole cohort
+  register_{backend}     one new registration
+  faculty_summary        daily log -> cube -> per-student summary
+  faculty_melt           "Classes Bunked by" melt for one student
+  absence_lookup         the same, plus "who bunked", from the absence index
+  student_lookup         Roll.No index build + one student's summary row
+  student_record         one student's subject-wise record from the cube
+  date_range_query       per-subject attendance over one month of the term
+  projection_export      what-if projection of the whole cohort, streamed to CSV
+
+Usage (from attendance_app/):
+    python benchmarks/suite.py --scale small -o bench.json
+    python benchmarks/suite.py --students 100000 --days 180 --subjects 10 -o big.json
+    python benchmarks/suite.py --scale small --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.join(APP_DIR, 'benchmarks'))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import generate  # noqa: E402
+import helpers  # noqa: E402
+from aggregation import cube_from_frame, student_record, student_summary  # noqa: E402
+from absence_index import build_absence_index  # noqa: E402
+from date_index import build_date_index  # noqa: E402
+from projection import Scenario, projection_batches, write_csv  # noqa: E402
+from roll_index import RollIndex  # noqa: E402
+from running_totals import RunningTotals  # noqa: E402
+from user_store import CsvUserStore, SqliteUserStore  # noqa: E402
+
+SCALES = {
+    'small': {'students': 1000, 'days': 60, 'subjects': 8},
+    'medium': {'students': 10000, 'days': 120, 'subjects': 8},
+    'large': {'students': 100000, 'days': 180, 'subjects': 10},
+}
+# A case slower than this factor of the baseline is reported by --compare.
+REGRESSION = 1.25
+
+
+def _time(fn, repeat: int, setup=None) -> dict:
+    times = []
+    for i in range(repeat):
+        if setup is not None:
+            setup()
+        t = time.perf_counter()
+        fn(i)
+        times.append(time.perf_counter() - t)
+    return {'median': statistics.median(times), 'min': min(times), 'repeat': repeat}
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=APP_DIR,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run_cases(paths: dict, repeat: int, work_dir: str) -> dict:
+    results = {}
+    roll = generate.roll_numbers(1)[0]
+    password = generate.DEFAULT_PASSWORD
+
+    results['read_attendance'] = _time(
+        lambda i: helpers.read_attendance(paths['summary']), repeat, setup=helpers._layout_cache.clear)
+
+    def read_log(i):
+        df = pd.read_csv(paths['daily_log'])
+        df.columns = df.columns.str.strip()
+        return df
+    results['read_daily_log'] = _time(read_log, repeat)
+    log = read_log(0)
+
+    csv_store = CsvUserStore(os.path.join(work_dir, 'users.csv'))
+    sqlite_store = SqliteUserStore(os.path.join(work_dir, 'users.db'))
+    sqlite_store.migrate_from_csv(paths['users'])
+    shutil.copy(paths['users'], csv_store.path)
+    for backend, store in (('csv', csv_store), ('sqlite', sqlite_store)):
+        results[f'check_login_{backend}'] = _time(
+            lambda i: helpers.check_login(roll, password, store), repeat)
+        results[f'register_{backend}'] = _time(
+            lambda i: store.add(f'bench-{backend}-{i}', helpers.hash_password(password), 'student'), repeat)
+
+    results['faculty_summary'] = _time(lambda i: student_summary(cube_from_frame(log)), repeat)
+
+    subject_cols = [c for c in log.columns if c not in ('Date', 'Roll.No')]
+
+    def melt(i):
+        student_data = log[log['Roll.No'] == roll]
+        bunked = student_data.melt(id_vars=['Date', 'Roll.No'], value_vars=subject_cols,
+                                   var_name='Subject', value_name='Status')
+        return bunked[bunked['Status'] == 'A']
+    results['faculty_melt'] = _time(melt, repeat)
+
+    summary = helpers.read_attendance(paths['summary'])
+
+    def lookup(i):
+        index = RollIndex(np.asarray(summary['Roll.No'], dtype=object))
+        return summary.iloc[index.offsets(roll)]
+    results['student_lookup'] = _time(lookup, repeat)
+
+    cube = cube_from_frame(log)
+    results['student_record'] = _time(lambda i: student_record(cube, roll), repeat)
+
+    absences = build_absence_index(cube)
+    date, subject = cube.dates[0], cube.subjects[0]
+    results['absence_lookup'] = _time(
+        lambda i: (absences.student_absences(roll), absences.absentees(date, subject)), repeat)
+
+    dates = build_date_index(cube)
+    month = (dates.days[0], dates.days[0] + np.timedelta64(30, 'D'))
+    results['date_range_query'] = _time(lambda i: dates.subject_attendance(*month), repeat)
+
+    totals = RunningTotals(subject_cols)
+    totals.add_rows(log)
+    rolls, attended, held = totals.counts()
+    counts = (rolls, subject_cols, attended, held)
+
+    def export(i):
+        with open(os.path.join(work_dir, 'projection.csv'), 'w', newline='') as out:
+            write_csv(projection_batches(counts, Scenario()), out)
+    results['projection_export'] = _time(export, repeat)
+    return results
+
+
+def compare(results: dict, baseline: dict) -> list:
+    """Return (case, baseline_s, current_s, ratio) for cases present in both runs."""
+    rows = []
+    for case, current in results['cases'].items():
+        before = baseline.get('cases', {}).get(case)
+        if before is None:
+            continue
+        rows.append((case, before['median'], current['median'], current['median'] / before['median']))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--students', type=int)
+    parser.add_argument('--days', type=int)
+    parser.add_argument('--subjects', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--data-dir', help="reuse (or create) generated data here instead of a temp dir")
+    parser.add_argument('-o', '--output', help="write results as JSON to this file")
+    parser.add_argument('--compare', help="baseline JSON from an earlier run")
+    args = parser.parse_args(argv)
+
+    params = dict(SCALES[args.scale])
+    for name in ('students', 'days', 'subjects'):
+        if getattr(args, name) is not None:
+            params[name] = getattr(args, name)
+
+    work_dir = tempfile.mkdtemp(prefix='attendance-bench-')
+    try:
+        data_dir = args.data_dir or os.path.join(work_dir, 'data')
+        paths = {
+            'daily_log': os.path.join(data_dir, 'faculty_attendance.csv'),
+            'summary': os.path.join(data_dir, 'attendance.csv'),
+            'users': os.path.join(data_dir, 'users.csv'),
+        }
+        if not all(os.path.exists(p) for p in paths.values()):
+            print(f"Generating {params} into {data_dir}")
+            paths = generate.generate_all(data_dir, seed=args.seed, **params)
+        cases = run_cases(paths, args.repeat, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'params': params,
+        'seed': args.seed,
+        'cases': cases,
+    }
+    for case, r in cases.items():
+        print(f"{case:<24} {r['median'] * 1000:10.2f} ms  (min {r['min'] * 1000:.2f} ms)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if not args.compare:
+        return 0
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    if baseline.get('params') != params:
+        print(f"Note: baseline was run with {baseline.get('params')}")
+    slower = 0
+    for case, before, now, ratio in compare(results, baseline):
+        flag = '  SLOWER' if ratio > REGRESSION else ''
+        slower += bool(flag)
+        print(f"{case:<24} {before * 1000:10.2f} -> {now * 1000:10.2f} ms  x{ratio:.2f}{flag}")
+    return 1 if slower else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
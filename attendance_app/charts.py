@@ -0,0 +1,99 @@
+import io
+
+import numpy as np
+from matplotlib.figure import Figure
+
+from attendance_cache import AttendanceCache, file_version
+from snapshots import register_cache
+
+# ================================
+# Overall Attendance % Chart
+# ================================
+# Charts are rendered with a bare `Figure` (no pyplot), so nothing is kept in
+# pyplot's global figure registry, and only the PNG bytes are cached.
+
+MODES = ["Per student", "Top-N at risk", "Histogram", "Percentile bands"]
+LARGE_COHORT = 200
+PAGE_SIZE = 100
+
+chart_cache = AttendanceCache(max_entries=64, max_bytes=64 * 1024 * 1024)
+register_cache(chart_cache)
+
+
+def default_mode(n_students: int) -> str:
+    return MODES[0] if n_students <= LARGE_COHORT else MODES[2]
+
+
+def page_count(n_students: int) -> int:
+    return max(1, -(-n_students // PAGE_SIZE))
+
+
+def _bar_chart(ax, rolls, percent, detained, title):
+    colors = ['#FF4B4B' if d else '#4CAF50' for d in detained]
+    ax.bar(rolls, percent, color=colors, edgecolor='black')
+    ax.set_ylabel("Attendance %")
+    ax.set_xlabel("Roll.No")
+    ax.set_ylim(0, 100)
+    ax.set_title(title)
+    ax.tick_params(axis='x', labelrotation=90)
+
+
+def render_attendance_chart(summary, mode: str, page: int = 0, top_n: int = 50,
+                            threshold: float = 75) -> bytes:
+    """Render the student summary (Roll.No / Percent / Detained) as PNG bytes."""
+    fig = Figure(figsize=(14, 5))
+    ax = fig.subplots()
+    percent = summary['Percent'].to_numpy(dtype=float)
+
+    if mode == "Per student":
+        part = summary.iloc[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+        title = "Overall Attendance Percentage per Student"
+        if len(summary) > PAGE_SIZE:
+            title += f" (page {page + 1} of {page_count(len(summary))})"
+        _bar_chart(ax, part['Roll.No'].astype(str), part['Percent'], part['Detained'], title)
+
+    elif mode == "Top-N at risk":
+        part = summary.nsmallest(top_n, 'Percent')
+        _bar_chart(ax, part['Roll.No'].astype(str), part['Percent'], part['Detained'],
+                   f"{len(part)} Students with the Lowest Attendance")
+
+    elif mode == "Histogram":
+        bins = np.arange(0, 105, 5)
+        counts, edges = np.histogram(percent, bins=bins)
+        colors = ['#FF4B4B' if left < threshold else '#4CAF50' for left in edges[:-1]]
+        ax.bar(edges[:-1], counts, width=5, align='edge', color=colors, edgecolor='black')
+        ax.set_xlabel("Attendance %")
+        ax.set_ylabel("Students")
+        ax.set_xlim(0, 100)
+        ax.set_title(f"Attendance Distribution ({len(percent)} students)")
+
+    elif mode == "Percentile bands":
+        ranks = np.linspace(0, 100, 101)
+        values = np.percentile(percent, ranks) if len(percent) else np.zeros_like(ranks)
+        ax.plot(ranks, values, color='#4B0082')
+        for lo, hi, alpha in ((10, 90, 0.15), (25, 75, 0.3)):
+            ax.axvspan(lo, hi, color='#4B0082', alpha=alpha, label=f"P{lo}–P{hi}")
+        ax.set_xlabel("Percentile of students")
+        ax.set_ylabel("Attendance %")
+        ax.set_xlim(0, 100)
+        ax.set_ylim(0, 100)
+        ax.set_title("Attendance % by Percentile")
+        ax.legend(loc='lower right')
+
+    else:
+        raise ValueError(f"Unknown chart mode: {mode!r}")
+
+    if mode != "Histogram":
+        ax.axhline(threshold, color='black', linestyle='--', linewidth=1)
+
+    buf = io.BytesIO()
+    fig.tight_layout()
+    fig.savefig(buf, format='png')
+    return buf.getvalue()
+
+
+def attendance_chart(path, summary, mode: str, page: int = 0, top_n: int = 50) -> bytes:
+    """Chart PNG for the data file at `path`, rendered once per data version and view."""
+    key = file_version(path) + ('attendance_chart', mode, page if mode == MODES[0] else 0,
+                                top_n if mode == MODES[1] else 0)
+    return chart_cache.get(key, lambda: render_attendance_chart(summary, mode, page, top_n))
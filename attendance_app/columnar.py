@@ -0,0 +1,257 @@
+import json
+import os
+import shutil
+import warnings
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+# ================================
+# Columnar Sidecar for the Daily Log
+# ================================
+# A daily P/A log CSV (Date, Roll.No, <subjects...>) gets a sibling directory
+# `<file>.cols/` holding plain .npy arrays that can be memory-mapped:
+#
+#   day.npy        int32  days since 1970-01-01, one per row
+#   roll_code.npy  int32  index into rolls.npy, one per row
+#   rolls.npy      <U     distinct roll numbers
+#   grid.npy       uint8  rows x subjects, 0 = A, 1 = P, 2 = blank
+#   date_days.npy / date_labels.npy  distinct days and their original text
+#   meta.json      subjects, column order and the source CSV's mtime/size
+
+# `date_reading` tries month-first on purpose; pandas warns whenever that
+# guesses a day-first format.
+warnings.filterwarnings('ignore', message=r'Parsing dates in .* format when dayfirst=',
+                        category=UserWarning, module=__name__)
+
+SIDECAR_SUFFIX = '.cols'
+FORMAT_VERSION = 2      # 2: day-first date labels are read day-first
+ABSENT, PRESENT, BLANK = 0, 1, 2
+
+
+def sidecar_path(csv_path) -> str:
+    return os.fspath(csv_path) + SIDECAR_SUFFIX
+
+
+class ColumnarLog:
+    """Daily attendance log held as (possibly memory-mapped) NumPy arrays."""
+
+    def __init__(self, day, roll_code, rolls, grid, subjects, date_days, date_labels, columns):
+        self.day = day
+        self.roll_code = roll_code
+        self.rolls = rolls
+        self.grid = grid
+        self.subjects = list(subjects)
+        self.date_days = date_days
+        self.date_labels = date_labels
+        self.columns = list(columns)
+
+    def __len__(self):
+        return len(self.day)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.day, self.roll_code, self.rolls, self.grid,
+                                      self.date_days, self.date_labels))
+
+    def to_frame(self) -> pd.DataFrame:
+        """Rebuild the CSV-shaped frame; subject columns come back as categoricals."""
+        date_idx = np.searchsorted(self.date_days, self.day)
+        data = {
+            'Date': self.date_labels.astype(object)[date_idx],
+            'Roll.No': self.rolls.astype(object)[self.roll_code],
+        }
+        for j, subject in enumerate(self.subjects):
+            codes = self.grid[:, j].astype(np.int8)
+            codes[codes == BLANK] = -1
+            data[subject] = pd.Categorical.from_codes(codes, categories=['A', 'P'])
+        return pd.DataFrame(data)[self.columns]
+
+
+# ================================
+# Date Labels
+# ================================
+def date_reading(labels):
+    """
+    How to read a log's date labels, as (format, dayfirst).
+
+    pandas guesses one format from the first label, month-first, so day-first
+    labels like 01-10-2025 / 13-10-2025 fail (or read as 10 January); they are
+    retried day-first, and whichever reading parses more labels wins
+    (month-first on a tie). `format` pins the reading for labels read later;
+    it is None when pandas can't name one.
+    """
+    labels = pd.Series(labels, dtype=object).dropna().astype(str)
+    labels = labels[labels.str.strip() != '']
+    best = (-1, None, False)
+    for dayfirst in (False, True):
+        parsed = pd.to_datetime(labels, errors='coerce', dayfirst=dayfirst)
+        n = int(parsed.notna().sum())
+        if n > best[0]:
+            fmt = guess_datetime_format(labels[parsed.notna()].iloc[0], dayfirst=dayfirst) if n else None
+            best = (n, fmt, dayfirst)
+    return best[1], best[2]
+
+
+def read_dates(labels, reading) -> pd.Series:
+    """`labels` as datetimes in `reading` (see `date_reading`); NaT where a label doesn't fit it."""
+    fmt, dayfirst = reading
+    labels = pd.Series(labels, dtype=object)
+    if fmt is not None:
+        return pd.to_datetime(labels, errors='coerce', format=fmt)
+    return pd.to_datetime(labels, errors='coerce', dayfirst=dayfirst)
+
+
+def parse_dates(dates, reading=None):
+    """
+    Log date labels as datetime64[D], or None if some label isn't a date.
+
+    Every label is read the same way, `reading` or else the one from
+    `date_reading`.
+    """
+    parsed = read_dates(dates, reading or date_reading(dates))
+    if parsed.isna().any():
+        return None
+    return parsed.to_numpy().astype('datetime64[D]')
+
+
+# ================================
+# Encoding
+# ================================
+def encode_frame(df: pd.DataFrame, reading=None):
+    """
+    Encode a daily log frame as a ColumnarLog, reading its dates with
+    `reading` (see `date_reading`; by default the one that fits them).
+
+    Returns None when the frame can't be represented exactly, e.g. unparseable
+    dates or status values other than P/A.
+    """
+    if 'Date' not in df.columns or 'Roll.No' not in df.columns:
+        return None
+    subjects = [c for c in df.columns if c not in ('Date', 'Roll.No')]
+
+    # Dates are parsed once per distinct label, not once per row.
+    date_code, labels = pd.factorize(df['Date'].astype(str))
+    labels = np.asarray(labels, dtype=object)
+    days = parse_dates(labels, reading)
+    if days is None:
+        return None
+    days = days.astype(np.int64).astype(np.int32)
+    day = days[date_code]
+    date_days, first = np.unique(days, return_index=True)
+    date_labels = labels[first].astype('U')
+
+    roll_code, rolls = pd.factorize(df['Roll.No'].astype(str))
+
+    grid = np.full((len(df), len(subjects)), BLANK, dtype=np.uint8)
+    for j, subject in enumerate(subjects):
+        values = df[subject]
+        is_p = (values == 'P').to_numpy(dtype=bool)
+        is_a = (values == 'A').to_numpy(dtype=bool)
+        if (values.notna().to_numpy() & ~(is_p | is_a)).any():
+            return None
+        grid[is_p, j] = PRESENT
+        grid[is_a, j] = ABSENT
+
+    return ColumnarLog(day, roll_code.astype(np.int32), np.asarray(rolls, dtype=object).astype('U'), grid,
+                       subjects, date_days, date_labels, df.columns)
+
+
+def write_sidecar(df: pd.DataFrame, csv_path):
+    """
+    Write the columnar sidecar for `csv_path`, which must already hold `df`.
+
+    Returns the sidecar directory, or None if the frame can't be encoded.
+    """
+    log = encode_frame(df)
+    if log is None:
+        return None
+    return _save(log, csv_path)
+
+
+def extend_sidecar(log: ColumnarLog, delta: pd.DataFrame, csv_path):
+    """
+    Write the sidecar for `csv_path`, which holds `log`'s rows followed by
+    `delta`'s (e.g. after an append), without re-reading the CSV.
+
+    Returns the sidecar directory, or None if the delta can't be encoded.
+    """
+    if list(delta.columns) != log.columns:
+        return None
+    # The delta's dates must be read the way the log's were, or the same
+    # label could land on two different days.
+    known = np.asarray(log.date_labels).astype(object)
+    reading = date_reading(np.concatenate([known, delta['Date'].astype(str).unique()]))
+    known_days = parse_dates(known, reading)
+    if known_days is None or not np.array_equal(known_days.astype(np.int64), log.date_days):
+        return None
+    add = encode_frame(delta, reading)
+    if add is None:
+        return None
+
+    rolls = np.asarray(log.rolls)
+    position = {r: i for i, r in enumerate(rolls.tolist())}
+    new_rolls = [r for r in add.rolls.tolist() if r not in position]
+    for r in new_rolls:
+        position[r] = len(position)
+    rolls = np.concatenate([rolls, np.asarray(new_rolls, dtype=str)])
+    remap = np.array([position[r] for r in add.rolls.tolist()], dtype=np.int32)
+
+    # Days already in the log keep their original label.
+    days = np.concatenate([np.asarray(log.date_days), add.date_days])
+    labels = np.concatenate([np.asarray(log.date_labels), add.date_labels])
+    date_days, first = np.unique(days, return_index=True)
+
+    merged = ColumnarLog(
+        np.concatenate([np.asarray(log.day), add.day]),
+        np.concatenate([np.asarray(log.roll_code), remap[add.roll_code]]),
+        rolls,
+        np.concatenate([np.asarray(log.grid), add.grid]),
+        log.subjects, date_days, labels[first], log.columns,
+    )
+    return _save(merged, csv_path)
+
+
+def _save(log: ColumnarLog, csv_path):
+    target = sidecar_path(csv_path)
+    tmp = target + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name in ('day', 'roll_code', 'rolls', 'grid', 'date_days', 'date_labels'):
+        np.save(os.path.join(tmp, name + '.npy'), getattr(log, name))
+
+    stat = os.stat(csv_path)
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'source_mtime_ns': stat.st_mtime_ns,
+        'source_size': stat.st_size,
+        'subjects': log.subjects,
+        'columns': log.columns,
+    }
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+    return target
+
+
+def load_sidecar(csv_path):
+    """Memory-map the sidecar for `csv_path`; None if it is missing, stale or unreadable."""
+    target = sidecar_path(csv_path)
+    try:
+        with open(os.path.join(target, 'meta.json')) as f:
+            meta = json.load(f)
+        stat = os.stat(csv_path)
+        if (meta.get('format_version') != FORMAT_VERSION
+                or meta['source_mtime_ns'] != stat.st_mtime_ns
+                or meta['source_size'] != stat.st_size):
+            return None
+        arrays = {
+            name: np.load(os.path.join(target, name + '.npy'), mmap_mode='r')
+            for name in ('day', 'roll_code', 'rolls', 'grid', 'date_days', 'date_labels')
+        }
+    except (OSError, ValueError, KeyError):
+        return None
+    return ColumnarLog(subjects=meta['subjects'], columns=meta['columns'], **arrays)
@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+
+from aggregation import load_cube
+from attendance_cache import get_derived
+from columnar import parse_dates
+
+# ================================
+# Date-indexed View of the Daily Log
+# ================================
+# The cube's date axis holds one slot per distinct date, so sorting it by real
+# date turns the log into date partitions: a date range is a contiguous slice
+# found by binary search, never a scan of the rows.
+
+FREQUENCIES = {'W': 'Weekly', 'M': 'Monthly'}
+
+
+def _to_day(date) -> np.datetime64:
+    return np.datetime64(pd.Timestamp(date).date(), 'D')
+
+
+class DateIndex:
+    """
+    The attendance cube with its date axis in calendar order.
+
+    `days` are datetime64[D] and `labels` the dates as written in the log.
+    Held classes are as in AttendanceCube.held: every student is out of the
+    classes anyone had a mark for.
+    Weekly and monthly series per subject and per student are computed once
+    when the index is built.
+    """
+
+    def __init__(self, cube, days):
+        order = np.argsort(days, kind='stable')
+        if np.array_equal(order, np.arange(len(order))):
+            present, recorded = cube.present, cube.recorded
+        else:
+            present, recorded = cube.present[:, order], cube.recorded[:, order]
+        self.rolls = cube.rolls
+        self.subjects = cube.subjects
+        self.days = days[order]
+        self.labels = np.asarray(cube.dates)[order]
+        self.present = present
+        self.recorded = recorded
+
+        # Per-day counts: dates x subjects and students x dates.
+        held = recorded.any(axis=0)
+        n_students = len(self.rolls)
+        self._subject_present = present.sum(axis=0, dtype=np.int32)
+        self._subject_held = held.astype(np.int32) * n_students
+        self._student_present = present.sum(axis=2, dtype=np.int32)
+        # The same for every student, so a broadcast view rather than a copy.
+        self._student_held = np.broadcast_to(held.sum(axis=1, dtype=np.int32), (n_students, len(self.days)))
+        self._trends = {freq: self._period_trends(freq) for freq in FREQUENCIES}
+
+    def __len__(self):
+        return len(self.days)
+
+    @property
+    def nbytes(self) -> int:
+        # The cube arrays are shared with the cached cube unless reordered.
+        return sum(a.nbytes for a in (self._subject_present, self._subject_held, self._student_present))
+
+    # ----- lookups -----
+    def span(self, start=None, end=None):
+        """Slice of the date axis covering start..end inclusive (either may be None)."""
+        lo = 0 if start is None else int(np.searchsorted(self.days, _to_day(start), side='left'))
+        hi = len(self.days) if end is None else int(np.searchsorted(self.days, _to_day(end), side='right'))
+        return slice(lo, max(lo, hi))
+
+    def position(self, date):
+        """Index of `date` on the date axis, or None if it has no records."""
+        s = self.span(date, date)
+        return s.start if s.stop > s.start else None
+
+    def absentees(self, date, subject) -> np.ndarray:
+        """Roll numbers marked A for `subject` on `date`."""
+        d = self.position(date)
+        if d is None:
+            return self.rolls[:0]
+        j = self.subjects.index(subject)
+        absent = self.recorded[:, d, j] & ~self.present[:, d, j]
+        return self.rolls[absent]
+
+    # ----- range queries -----
+    def subject_attendance(self, start=None, end=None) -> pd.DataFrame:
+        """Attended / held classes and percent per subject between two dates."""
+        s = self.span(start, end)
+        attended = self._subject_present[s].sum(axis=0)
+        held = self._subject_held[s].sum(axis=0)
+        return pd.DataFrame({
+            'Subject': self.subjects,
+            'Attended': attended,
+            'Held': held,
+            'Percent': np.divide(attended * 100.0, held, out=np.zeros(len(held)), where=held > 0),
+        })
+
+    def student_attendance(self, start=None, end=None) -> pd.DataFrame:
+        """Attended / held classes and percent per student between two dates."""
+        s = self.span(start, end)
+        attended = self._student_present[:, s].sum(axis=1)
+        held = self._student_held[:, s].sum(axis=1)
+        return pd.DataFrame({
+            'Roll.No': self.rolls.astype(object),
+            'Attended': attended,
+            'Held': held,
+            'Percent': np.divide(attended * 100.0, held, out=np.zeros(len(held)), where=held > 0),
+        })
+
+    # ----- weekly / monthly series -----
+    def _period_trends(self, freq: str) -> dict:
+        if len(self.days) == 0:
+            empty = pd.DatetimeIndex([])
+            return {'index': empty, 'subject': np.zeros((0, len(self.subjects))),
+                    'student': np.zeros((len(self.rolls), 0))}
+        periods = pd.PeriodIndex(pd.DatetimeIndex(self.days), freq=freq)
+        # Days are sorted, so each period is a contiguous run of the date axis.
+        starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+
+        def percent(present, held, axis):
+            p = np.add.reduceat(present, starts, axis=axis)
+            h = np.add.reduceat(held, starts, axis=axis)
+            return np.divide(p * 100.0, h, out=np.full(p.shape, np.nan), where=h > 0)
+
+        return {
+            'index': periods[starts].start_time,
+            'subject': percent(self._subject_present, self._subject_held, 0),
+            'student': percent(self._student_present, self._student_held, 1),
+        }
+
+    def subject_trend(self, freq: str = 'W') -> pd.DataFrame:
+        """Attendance % per subject (columns) for each week or month (rows)."""
+        t = self._trends[freq]
+        return pd.DataFrame(t['subject'], index=t['index'], columns=self.subjects)
+
+    def student_trend(self, roll, freq: str = 'W'):
+        """Attendance % of one student per week or month, or None if not in the log."""
+        i = int(np.searchsorted(self.rolls, str(roll)))
+        if i >= len(self.rolls) or self.rolls[i] != str(roll):
+            return None
+        t = self._trends[freq]
+        return pd.Series(t['student'][i], index=t['index'], name=str(roll))
+
+    def student_trends(self, freq: str = 'W') -> pd.DataFrame:
+        """Attendance % per student (rows) and week or month (columns)."""
+        t = self._trends[freq]
+        return pd.DataFrame(t['student'], index=self.rolls.astype(object), columns=t['index'])
+
+
+def build_date_index(cube):
+    """DateIndex for a cube, or None if some date in the log isn't a parseable date."""
+    days = parse_dates(cube.dates)
+    return DateIndex(cube, days) if days is not None else None
+
+
+def load_date_index(path):
+    """Date index for the daily log at `path`, built once per data version."""
+    return get_derived(path, 'date_index', lambda: build_date_index(load_cube(path)))
@@ -1,7 +1,20 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import os
+from attendance_cache import load_daily_log_head
+from aggregation import DETENTION_THRESHOLD, load_cube, load_student_subject_summary, load_student_summary
+from date_index import FREQUENCIES, load_date_index
+from absence_index import load_absence_index
+from streaks import MIN_STREAK, load_streaks
+import charts
+import projection
+from ingest import append_days_snapshot
+from forecast import DEFAULT_TERM_DAYS, load_forecast
+from running_totals import load_summary_csv
+from upload import UploadError, read_upload, stream_replace
+from instrumentation import span
+from snapshots import open_snapshots, pinned
+import precompute
 
 # -------------------------
 # Helper function for readable text color
@@ -15,13 +28,6 @@ def readable_text_color(bg_color):
     brightness = (r*299 + g*587 + b*114) / 1000
     return 'black' if brightness > 125 else 'white'
 
-# Page config
-st.set_page_config(
-    page_title="Faculty Dashboard",
-    page_icon="👩‍🏫",
-    layout="wide"
-)
-
 def faculty_dashboard(username=None):
     st.markdown("<h1 style='text-align:center;color:#4B0082;'>👩‍🏫 Faculty Dashboard</h1>", unsafe_allow_html=True)
     st.markdown("---")
@@ -32,70 +38,244 @@ def faculty_dashboard(username=None):
     # Upload CSV
     # -----------------------------
     with st.expander("📤 Upload Attendance CSV", expanded=False):
+        mode = st.radio("Upload mode", ["Replace all data", "Append days"], horizontal=True,
+                        help="Append days: upload only the new dates; rows for an existing "
+                             "Date + Roll.No are replaced.")
         uploaded = st.file_uploader("Upload CSV File", type=['csv'])
-        if uploaded is not None:
-            df = pd.read_csv(uploaded)
+        skip_bad_rows = st.checkbox("Skip invalid rows", value=False,
+                                    help="Otherwise any row with a bad Date, Roll.No or status rejects the upload.")
+        # The uploader keeps its file across reruns, so ingesting waits for an
+        # explicit click; changing the mode or a checkbox never re-ingests it.
+        ingest = st.button("📥 Ingest upload", disabled=uploaded is None)
+        if uploaded is not None and ingest:
             os.makedirs("data", exist_ok=True)
-            df.to_csv(data_file, index=False)
-            st.success("✅ Attendance data uploaded successfully!")
+            try:
+                if mode == "Append days":
+                    with span('faculty.upload_parse') as s:
+                        df, report = read_upload(uploaded, skip_bad_rows=skip_bad_rows)
+                        s.rows = len(df)
+                    with span('faculty.append_days', rows=len(df)):
+                        result = append_days_snapshot(df, data_file)
+                    message = (f"✅ Added {result['appended']} rows, replaced {result['replaced']} "
+                               f"({len(result['new_dates'])} new dates).")
+                else:
+                    with span('faculty.replace_all') as s:
+                        with open_snapshots(data_file).new_version() as path:
+                            report = stream_replace(uploaded, path, skip_bad_rows=skip_bad_rows)
+                        s.rows = report['rows']
+                    message = f"✅ Attendance data uploaded successfully! ({report['written']} rows)"
+            except UploadError as e:
+                st.error(str(e))
+                if e.report and e.report['problems']:
+                    st.dataframe(pd.DataFrame(e.report['problems']), use_container_width=True, hide_index=True)
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                # Summaries, indexes and the chart are built off the rerun thread.
+                precompute.schedule(data_file, pinned(data_file))
+                st.success(message)
+                if report['bad_rows']:
+                    st.warning(f"Skipped {report['bad_rows']} invalid rows.")
+                    st.dataframe(pd.DataFrame(report['problems']), use_container_width=True, hide_index=True)
 
-    if not os.path.exists(data_file):
+    # Everything below reads one version: the one pinned for this rerun once
+    # its summaries are precomputed, until then the previous one.
+    current = pinned(data_file)
+    if current is None:
         st.warning("No attendance file found. Please upload one.")
         return
+    served, refreshing = precompute.serving(data_file, current)
+    if served is None:
+        st.info("⏳ Refreshing attendance summaries…")
+        precompute.wait(current)
+        st.rerun()
+    if refreshing:
+        st.caption("⏳ Refreshing… showing the previous upload until the new summaries are ready.")
+    data_file = served
 
     # -----------------------------
     # Load CSV
     # -----------------------------
-    df = pd.read_csv(data_file)
-    df.columns = df.columns.str.strip()
+    # Only the preview rows are read; everything else comes from the cube
+    # and the indexes built from it.
+    with span('faculty.load_daily_log') as s:
+        preview = load_daily_log_head(data_file)
+        cube = load_cube(data_file)
+        s.rows = len(preview)
 
     st.subheader("📋 Attendance Data Preview")
-    st.dataframe(df.head(10), use_container_width=True)
+    st.dataframe(preview, use_container_width=True)
 
     # -----------------------------
     # Subject & Date Selection
     # -----------------------------
-    subject_cols = [col for col in df.columns if col not in ['Date', 'Roll.No']]
+    subject_cols = cube.subjects
+    with span('faculty.date_index') as s:
+        dates = load_date_index(data_file)
+        s.rows = len(dates) if dates is not None else None
+    with span('faculty.absence_index') as s:
+        absences = load_absence_index(data_file)
+        s.rows = len(absences)
     col1, col2 = st.columns(2)
     with col1:
         selected_subject = st.selectbox("📘 Select Subject", subject_cols)
     with col2:
-        selected_date = st.selectbox("📅 Select Date", sorted(df['Date'].unique()))
+        date_options = list(dates.labels) if dates is not None else list(cube.dates)
+        selected_date = st.selectbox("📅 Select Date", date_options)
 
     # -----------------------------
     # Students who bunked
     # -----------------------------
     st.markdown(f"### 🚫 Students Who Bunked {selected_subject} on {selected_date}")
-    bunked = df[(df['Date'] == selected_date) & (df[selected_subject] == 'A')]
-    if not bunked.empty:
-        st.dataframe(bunked[['Roll.No', selected_subject]], use_container_width=True)
+    n_bunked = absences.absentee_count(selected_date, selected_subject)
+    if n_bunked:
+        page = 0
+        if n_bunked > charts.PAGE_SIZE:
+            page = st.number_input(f"Page ({n_bunked} students)", min_value=1,
+                                   max_value=charts.page_count(n_bunked), value=1, key="bunked_page") - 1
+        with span('faculty.bunked_filter') as s:
+            rolls = absences.absentees(selected_date, selected_subject,
+                                       offset=page * charts.PAGE_SIZE, limit=charts.PAGE_SIZE)
+            s.rows = len(rolls)
+        st.dataframe(pd.DataFrame({'Roll.No': rolls.astype(object), selected_subject: 'A'}),
+                     use_container_width=True, hide_index=True)
     else:
         st.success(f"✅ No one bunked {selected_subject} on {selected_date}!")
 
     # -----------------------------
-    # Attendance summary
+    # Below the threshold in the subject
+    # -----------------------------
+    with span('faculty.student_subject_summary') as s:
+        per_subject = load_student_subject_summary(data_file)
+        s.rows = len(per_subject)
+    below = per_subject[(per_subject['Subject'] == selected_subject) & (per_subject['Detained'] == 1)]
+    st.markdown(f"### 📕 Below {DETENTION_THRESHOLD}% in {selected_subject}")
+    if len(below):
+        st.caption(f"{len(below)} students; lowest 50 shown.")
+        st.dataframe(below.nsmallest(50, 'Percent').drop(columns=['Subject', 'Detained']).round(2),
+                     use_container_width=True, hide_index=True)
+    else:
+        st.success(f"✅ Everyone is at or above {DETENTION_THRESHOLD}% in {selected_subject}.")
+
+    # -----------------------------
+    # Date range & trends
     # -----------------------------
-    df['Classes_Attended'] = df[subject_cols].apply(lambda x: (x == 'P').sum(), axis=1)
-    total_classes_per_day = len(subject_cols)
-    total_classes = total_classes_per_day * df['Date'].nunique()
+    if dates is not None and len(dates):
+        st.markdown("### 📆 Attendance Over Time")
+        first, last = dates.days[0].astype(object), dates.days[-1].astype(object)
+        col1, col2 = st.columns(2)
+        with col1:
+            date_range = st.date_input("Date range", value=(first, last), min_value=first, max_value=last)
+        with col2:
+            freq = st.radio("Trend", list(FREQUENCIES), format_func=FREQUENCIES.get, horizontal=True)
+        if isinstance(date_range, (tuple, list)) and len(date_range) == 2:
+            with span('faculty.range_query'):
+                in_range = dates.subject_attendance(*date_range)
+            st.dataframe(in_range.round(2), use_container_width=True, hide_index=True)
+        st.line_chart(dates.subject_trend(freq))
 
-    student_summary = df.groupby('Roll.No')['Classes_Attended'].sum().reset_index()
-    student_summary['Percent'] = (student_summary['Classes_Attended'] / total_classes) * 100
-    student_summary['Detained'] = (student_summary['Percent'] < 75).astype(int)
+    # -----------------------------
+    # Attendance summary
+    # -----------------------------
+    with span('faculty.student_summary') as s:
+        student_summary = load_student_summary(data_file)
+        s.rows = len(student_summary)
+    st.download_button("⬇️ Download per-student summary (Attendance.csv layout)",
+                       load_summary_csv(data_file),
+                       file_name="attendance_summary.csv", mime="text/csv")
 
     # -----------------------------
     # Attendance chart card
     # -----------------------------
     st.markdown("### 📊 Overall Attendance % per Student")
-    fig, ax = plt.subplots(figsize=(14, 5))
-    colors = ['#FF4B4B' if d else '#4CAF50' for d in student_summary['Detained']]
-    ax.bar(student_summary['Roll.No'], student_summary['Percent'], color=colors, edgecolor='black')
-    ax.set_ylabel("Attendance %")
-    ax.set_xlabel("Roll.No")
-    ax.set_ylim(0, 100)
-    ax.set_title("Overall Attendance Percentage per Student")
-    plt.xticks(rotation=90)
-    st.pyplot(fig)
+    n_students = len(student_summary)
+    col1, col2 = st.columns(2)
+    with col1:
+        chart_mode = st.selectbox("Chart view", charts.MODES,
+                                  index=charts.MODES.index(charts.default_mode(n_students)))
+    page, top_n = 0, 50
+    with col2:
+        if chart_mode == "Per student" and n_students > charts.PAGE_SIZE:
+            page = st.number_input("Page", min_value=1, max_value=charts.page_count(n_students), value=1) - 1
+        elif chart_mode == "Top-N at risk":
+            top_n = st.slider("Students to show", min_value=10, max_value=200, value=50, step=10)
+    with span('faculty.attendance_chart', rows=n_students):
+        st.image(charts.attendance_chart(data_file, student_summary, chart_mode, page, top_n),
+                 use_container_width=True)
+
+    # -----------------------------
+    # Detention forecast
+    # -----------------------------
+    st.markdown("### 🔮 Detention Forecast")
+    term_days = st.number_input("Teaching days in the term", min_value=1, value=DEFAULT_TERM_DAYS, step=1)
+    with span('faculty.forecast') as s:
+        forecast_students, forecast_subjects = load_forecast(data_file, int(term_days))
+        s.rows = len(forecast_students)
+    at_risk = forecast_students.sort_values('Detention_Probability', ascending=False)
+    st.dataframe(at_risk.head(50).round(2), use_container_width=True, hide_index=True)
+
+    # -----------------------------
+    # What-if projection
+    # -----------------------------
+    st.markdown("### 🧮 What-if Projection")
+    col1, col2 = st.columns(2)
+    with col1:
+        threshold = st.number_input("Required attendance %", min_value=1, max_value=99,
+                                    value=DETENTION_THRESHOLD, step=1)
+    with col2:
+        own_rate = st.radio("Remaining classes attended at", ["Each student's rate so far", "A fixed rate"],
+                            horizontal=True) == "Each student's rate so far"
+    rate = None if own_rate else st.slider("Fixed attendance rate %", 0, 100, 75) / 100
+    scenario = projection.Scenario(int(term_days), rate=rate, threshold=threshold)
+    with span('faculty.projection') as s:
+        counts = projection.load_counts(data_file)
+        preview = projection.at_risk(counts, scenario)
+        s.rows = len(counts[0])
+    st.caption(f"Lowest projected students first; remaining classes assume {int(term_days)} teaching days.")
+    st.dataframe(preview.round(2), use_container_width=True, hide_index=True)
+
+    formats = ['csv', 'xlsx'] if projection.xlsx_available() else ['csv']
+    fmt = st.radio("Export format", formats, format_func=str.upper, horizontal=True)
+    # Built on the export worker and streamed to disk batch by batch.
+    target = projection.export_path(data_file, scenario, fmt)
+    state = 'ready' if os.path.exists(target) else precompute.status(target)
+    if state == 'ready':
+        with open(target, 'rb') as f:
+            st.download_button(f"⬇️ Download what-if projection ({fmt.upper()})", f,
+                               file_name=f"projection.{fmt}", mime=projection.FORMATS[fmt])
+    elif state == 'refreshing':
+        st.info("⏳ Preparing the export…")
+        st.button("🔄 Check again")
+    else:
+        if state == 'failed':
+            st.error("The last export failed; see the server log.")
+        if st.button(f"Prepare {fmt.upper()} export for all {len(counts[0])} students"):
+            precompute.submit_export(target, projection.export, data_file, scenario, fmt)
+            st.rerun()
+
+    # -----------------------------
+    # Absence streaks & patterns
+    # -----------------------------
+    with span('faculty.streaks'):
+        analytics = load_streaks(data_file)
+    if analytics is not None:
+        st.markdown("### 🧭 Absence Streaks & Patterns")
+        min_streak = st.number_input("Consecutive absent days", min_value=2, value=MIN_STREAK, step=1)
+        students_tab, streaks_tab, patterns_tab = st.tabs(["Students", "Streaks", "Weekday patterns"])
+        with students_tab:
+            students = analytics.students(int(min_streak))
+            flagged = students[students['Longest_Streak'] >= min_streak]
+            st.caption(f"{len(flagged)} students missed {min_streak}+ days in a row.")
+            st.dataframe(flagged.sort_values('Longest_Streak', ascending=False),
+                         use_container_width=True, hide_index=True)
+        with streaks_tab:
+            streak_rows = analytics.streaks(int(min_streak))
+            st.dataframe(streak_rows.head(1000), use_container_width=True, hide_index=True)
+        with patterns_tab:
+            st.caption("Cohort absence % by weekday and subject")
+            st.dataframe(analytics.cohort_profile().round(1), use_container_width=True)
+            st.caption("Students who skip a subject on the same weekday")
+            st.dataframe(analytics.patterns().head(1000).round(1), use_container_width=True, hide_index=True)
 
     # -----------------------------
     # Student Detention & Bunked Classes Card
@@ -127,16 +307,27 @@ def faculty_dashboard(username=None):
                             f"<h3 style='color:{text_color2}'>Detention Risk</h3>"
                             f"<h2 style='color:{text_color2};'>{'⚠️ At Risk' if detained else '✅ Safe'}</h2></div>", unsafe_allow_html=True)
 
+            forecast_row = forecast_students[forecast_students['Roll.No'] == roll]
+            if not forecast_row.empty:
+                st.caption(f"🔮 Projected end-of-term attendance: {forecast_row['Projected_Percent'].iloc[0]:.1f}% "
+                           f"· detention probability {forecast_row['Detention_Probability'].iloc[0]:.0%}")
+
             # =========================
             # Bunked classes table
             # =========================
             st.markdown(f"#### 📌 Classes Bunked by {roll}")
-            student_data = df[df['Roll.No'] == roll]
-            bunked_classes = student_data.melt(id_vars=['Date', 'Roll.No'], value_vars=subject_cols,
-                                               var_name='Subject', value_name='Status')
-            bunked_classes = bunked_classes[bunked_classes['Status'] == 'A']
-            if not bunked_classes.empty:
-                st.dataframe(bunked_classes[['Date', 'Subject']], use_container_width=True)
+            n_absences = absences.absence_count(roll)
+            if n_absences:
+                page = 0
+                if n_absences > charts.PAGE_SIZE:
+                    page = st.number_input(f"Page ({n_absences} classes)", min_value=1,
+                                           max_value=charts.page_count(n_absences), value=1,
+                                           key="student_bunked_page") - 1
+                with span('faculty.student_absences') as s:
+                    bunked_classes = absences.student_absences(roll, offset=page * charts.PAGE_SIZE,
+                                                               limit=charts.PAGE_SIZE)
+                    s.rows = len(bunked_classes)
+                st.dataframe(bunked_classes, use_container_width=True, hide_index=True)
             else:
                 st.success("✅ Student has not bunked any classes!")
         else:
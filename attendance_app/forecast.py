@@ -0,0 +1,225 @@
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from aggregation import DETENTION_THRESHOLD, calendar_order, cube_from_frame, load_cube
+from attendance_cache import file_version, get_derived
+from columnar import parse_dates
+
+# ================================
+# Detention Forecasting
+# ================================
+# Each (student, subject) attendance rate gets a Beta posterior: a per-subject
+# cohort prior (fitted by method of moments) plus the student's own marks,
+# with older days decayed so recent behaviour counts more. The remaining
+# classes of the term are then treated as Binomial(remaining, rate) to get a
+# projected end-of-term % and the probability of finishing under 75%.
+#
+# The model is just running sums, so a new day is folded in with a few array
+# operations (`partial_fit`) instead of refitting the whole term.
+
+DEFAULT_TERM_DAYS = 90
+DECAY = 0.97            # weight kept by a day's marks after each later day
+PRIOR_STRENGTH = 10.0   # cap on prior pseudo-classes, so students' own data dominates
+MODEL_SUFFIX = '.forecast.npz'
+
+
+def model_path(log_path) -> str:
+    return os.fspath(log_path) + MODEL_SUFFIX
+
+
+def _normal_cdf(x):
+    # Vectorized Phi via erf (Abramowitz & Stegun 7.1.26, |error| < 1.5e-7).
+    z = np.abs(x) / math.sqrt(2)
+    t = 1.0 / (1.0 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-z * z)
+    return 0.5 * (1.0 + np.sign(x) * erf)
+
+
+class ForecastModel:
+    """Sufficient statistics for the detention forecast of one daily log."""
+
+    def __init__(self, rolls, subjects, attended, held, attended_w, held_w, version=None):
+        self.rolls = np.asarray(rolls)
+        self.subjects = list(subjects)
+        self.attended = attended        # students x subjects, exact counts
+        self.held = held                # subjects, classes held so far
+        self.attended_w = attended_w    # students x subjects, decayed counts
+        self.held_w = held_w            # subjects, decayed classes held
+        self.version = version
+
+    @property
+    def nbytes(self) -> int:
+        return self.attended.nbytes + self.attended_w.nbytes
+
+    # ----- fitting -----
+    @classmethod
+    def fit(cls, cube, version=None):
+        """Fit from a whole AttendanceCube."""
+        n_students, _, n_subjects = cube.shape
+        model = cls(cube.rolls, cube.subjects,
+                    np.zeros((n_students, n_subjects), dtype=np.int64), np.zeros(n_subjects, dtype=np.int64),
+                    np.zeros((n_students, n_subjects)), np.zeros(n_subjects), version)
+        model._add_days(cube, np.arange(n_students))
+        return model
+
+    def partial_fit(self, delta_cube, version=None):
+        """Fold in days that come after everything already fitted."""
+        known = {r: i for i, r in enumerate(self.rolls)}
+        new_rolls = [r for r in delta_cube.rolls if r not in known]
+        if new_rolls:
+            for i, r in enumerate(new_rolls, start=len(self.rolls)):
+                known[r] = i
+            self.rolls = np.concatenate([self.rolls, np.asarray(new_rolls, dtype=self.rolls.dtype)])
+            pad = ((0, len(new_rolls)), (0, 0))
+            self.attended = np.pad(self.attended, pad)
+            self.attended_w = np.pad(self.attended_w, pad)
+        rows = np.array([known[r] for r in delta_cube.rolls], dtype=np.int64)
+        subject_idx = [self.subjects.index(s) for s in delta_cube.subjects]
+        if subject_idx != list(range(len(self.subjects))):
+            raise ValueError("Delta subjects don't match the fitted model.")
+        self._add_days(delta_cube, rows)
+        self.version = version
+
+    def _add_days(self, cube, rows):
+        # Oldest first, so the decay weights recent days the most.
+        for d in calendar_order(cube.dates):
+            present = cube.present[:, d, :]
+            held_today = cube.recorded[:, d, :].any(axis=0)
+            self.attended_w *= DECAY
+            self.held_w *= DECAY
+            self.attended[rows] += present
+            self.attended_w[rows] += present
+            self.held += held_today
+            self.held_w += held_today
+
+    # ----- prediction -----
+    def _prior(self):
+        """Per-subject Beta(alpha, beta) from the spread of students' rates."""
+        held = np.maximum(self.held_w, 1e-9)
+        rates = self.attended_w / held
+        mean = rates.mean(axis=0) if len(rates) else np.full(len(self.subjects), 0.5)
+        var = rates.var(axis=0) if len(rates) else np.zeros(len(self.subjects))
+        mean = np.clip(mean, 1e-3, 1 - 1e-3)
+        strength = np.where(var > 0, mean * (1 - mean) / np.maximum(var, 1e-12) - 1, PRIOR_STRENGTH)
+        strength = np.clip(strength, 1.0, PRIOR_STRENGTH)
+        return mean * strength, (1 - mean) * strength
+
+    def rates(self):
+        alpha, beta = self._prior()
+        return (alpha + self.attended_w) / (alpha + beta + self.held_w)
+
+    def predict(self, term_days: int = DEFAULT_TERM_DAYS, threshold: float = DETENTION_THRESHOLD):
+        """
+        Score every student at once.
+
+        Returns:
+            (per_student, per_subject) DataFrames with current and projected
+            end-of-term percentages and the probability of ending below
+            `threshold`.
+        """
+        p = self.rates()
+        remaining = np.maximum(term_days - self.held, 0).astype(float)     # subjects
+        final_held = self.held + remaining
+        required = threshold / 100.0
+
+        def score(attended, held, mean, var, final):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                current = np.where(held > 0, attended / held * 100, 0.0)
+                projected = np.where(final > 0, (attended + mean) / final * 100, 0.0)
+                need = np.ceil(required * final - 1e-9) - attended
+                z = (need - 0.5 - mean) / np.sqrt(var)
+                prob = np.where(var > 0, _normal_cdf(z), (attended + mean < required * final).astype(float))
+            return current, projected, np.clip(prob, 0.0, 1.0)
+
+        mean = p * remaining
+        var = p * (1 - p) * remaining
+        cur, proj, prob = score(self.attended, self.held, mean, var, final_held)
+        n_students, n_subjects = self.attended.shape
+        per_subject = pd.DataFrame({
+            'Roll.No': np.repeat(self.rolls.astype(object), n_subjects),
+            'Subject': np.tile(np.asarray(self.subjects, dtype=object), n_students),
+            'Attended': self.attended.ravel(),
+            'Held': np.tile(self.held, n_students),
+            'Percent': cur.ravel(),
+            'Projected_Percent': proj.ravel(),
+            'Detention_Probability': prob.ravel(),
+        })
+
+        cur, proj, prob = score(self.attended.sum(axis=1), self.held.sum(), mean.sum(axis=1),
+                                var.sum(axis=1), final_held.sum())
+        per_student = pd.DataFrame({
+            'Roll.No': self.rolls.astype(object),
+            'Attended': self.attended.sum(axis=1),
+            'Held': self.held.sum(),
+            'Percent': cur,
+            'Projected_Percent': proj,
+            'Detention_Probability': prob,
+        })
+        return per_student, per_subject
+
+    # ----- persistence -----
+    def save(self, log_path):
+        self.version = file_version(log_path)
+        target = model_path(log_path)
+        tmp = target + '.tmp.npz'
+        np.savez(tmp, rolls=self.rolls, attended=self.attended, held=self.held,
+                 attended_w=self.attended_w, held_w=self.held_w,
+                 meta=np.array(json.dumps({'subjects': self.subjects, 'version': list(self.version)})))
+        os.replace(tmp, target)
+
+    @classmethod
+    def load(cls, log_path):
+        """The saved model, or None if missing or unreadable (version is not checked)."""
+        try:
+            with np.load(model_path(log_path)) as data:
+                meta = json.loads(str(data['meta']))
+                return cls(data['rolls'], meta['subjects'], data['attended'], data['held'],
+                           data['attended_w'], data['held_w'], tuple(meta['version']))
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def load_model(log_path) -> ForecastModel:
+    """The model for the current log version: loaded from disk, or refitted and saved."""
+    def build():
+        model = ForecastModel.load(log_path)
+        if model is None or model.version != file_version(log_path):
+            model = ForecastModel.fit(load_cube(log_path))
+            model.save(log_path)
+        return model
+    return get_derived(log_path, 'forecast_model', build)
+
+
+def update_model(log_path, delta: pd.DataFrame, previous_version, fitted_dates=()):
+    """
+    After `delta` (only new dates) was appended to the log, fold it into the
+    saved model, whose days are `fitted_dates` (the log's dates before the
+    append).
+
+    `partial_fit` decays the delta as the newest days, so a delta reaching
+    back before the last fitted day (a backfill), dates that don't parse,
+    or a saved model that wasn't for `previous_version` all fall back to a
+    lazy refit.
+    """
+    model = ForecastModel.load(log_path)
+    if model is None or model.version != previous_version:
+        return None
+    fitted = list(fitted_dates)
+    if fitted:
+        days = parse_dates(fitted + list(delta['Date'].astype(str).unique()))
+        if days is None or days[len(fitted):].min() <= days[:len(fitted)].max():
+            return None
+    model.partial_fit(cube_from_frame(delta))
+    model.save(log_path)
+    return model
+
+
+def load_forecast(log_path, term_days: int = DEFAULT_TERM_DAYS):
+    """Cached (per_student, per_subject) forecast frames for the current log version."""
+    return get_derived(log_path, ('forecast', term_days),
+                       lambda: load_model(log_path).predict(term_days))
@@ -1,4 +1,9 @@
+import csv
 import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
 
 # ================================
@@ -12,60 +17,175 @@ def hash_password(password: str) -> str:
 # ================================
 # Login Validation
 # ================================
-def check_login(username: str, password: str, users_df: pd.DataFrame):
-    """Check if username and hashed password match."""
+def check_login(username: str, password: str, users):
+    """
+    Check if username and hashed password match.
+
+    `users` is a user store (see user_store.py) or a users DataFrame.
+    """
     hashed = hash_password(password)
-    user = users_df[
-        (users_df['username'].astype(str) == str(username))
-        & (users_df['password'] == hashed)
-    ]
-    if not user.empty:
-        return user.iloc[0]['role']
+    if isinstance(users, pd.DataFrame):
+        user = users[
+            (users['username'].astype(str) == str(username))
+            & (users['password'] == hashed)
+        ]
+        if not user.empty:
+            return user.iloc[0]['role']
+        return None
+
+    user = users.get(str(username))
+    if user is not None and user['password'] == hashed:
+        return user['role']
     return None
 
 
+# ================================
+# Detention Maths
+# ================================
+def classes_needed(attended, total, required_percent: float = 75):
+    """
+    Consecutive classes a student must attend to reach `required_percent`.
+
+    Works on scalars or arrays; students already above the line need 0.
+    """
+    required = required_percent / 100
+    needed = (required * np.asarray(total, dtype=float) - np.asarray(attended, dtype=float)) / (1 - required)
+    return np.ceil(np.maximum(needed, 0)).astype(int)
+
+
 # ================================
 # Attendance Reader (Smart Header Finder)
 # ================================
-def read_attendance(path_or_buffer, max_header_rows: int = 6) -> pd.DataFrame:
+SNIFF_BYTES = 16 * 1024
+_LAYOUT_CACHE_SIZE = 128
+_layout_cache = OrderedDict()   # (path, mtime, size, max_header_rows) -> layout
+
+
+def _sniff_text(path_or_buffer, nbytes: int = SNIFF_BYTES):
+    """
+    Read only the first `nbytes` of a path or buffer as text.
+
+    Returns:
+        (text, how many bytes - or characters, for a text buffer - were
+        read), so a cut-off read can be told apart from a short file.
+    """
+    if hasattr(path_or_buffer, 'read'):
+        try:
+            path_or_buffer.seek(0)
+        except Exception:
+            pass
+        data = path_or_buffer.read(nbytes)
+        try:
+            path_or_buffer.seek(0)
+        except Exception:
+            pass
+    else:
+        with open(path_or_buffer, 'rb') as f:
+            data = f.read(nbytes)
+
+    nread = len(data)
+    if isinstance(data, bytes):
+        data = data.decode('utf-8', errors='replace')
+    return data.lstrip('\ufeff'), nread
+
+
+def sniff_layout(text: str, max_header_rows: int = 6, truncated: bool = False) -> dict:
+    """
+    Find the header row and the metadata rows in the top of an attendance CSV.
+
+    Metadata rows are lines below the header with no Roll.No, such as the
+    `Batch-1` totals line or a report-period banner.
+
+    Returns:
+        Dict with `header` (line number of the header, or None if not found),
+        `roll_column` (raw header cell for Roll.No) and `metadata_rows`.
+    """
+    lines = text.splitlines()
+    if truncated and lines:
+        lines = lines[:-1]    # last line may be cut off mid-row
+    rows = list(csv.reader(lines))
+
+    layout = {'header': None, 'roll_column': None, 'metadata_rows': []}
+    for i, row in enumerate(rows[:max_header_rows]):
+        cells = [c.strip() for c in row]
+        if 'Roll.No' in cells:
+            layout['header'] = i
+            layout['roll_column'] = row[cells.index('Roll.No')]
+            roll_idx = cells.index('Roll.No')
+            break
+    else:
+        return layout
+
+    for i, row in enumerate(rows[layout['header'] + 1:], start=layout['header'] + 1):
+        if not any(c.strip() for c in row):
+            continue    # blank lines are skipped by pandas anyway
+        roll = row[roll_idx].strip() if len(row) > roll_idx else ''
+        if not roll:
+            layout['metadata_rows'].append(i)
+    return layout
+
+
+def _cached_layout(path_or_buffer, max_header_rows: int) -> dict:
+    """Sniff a layout, reusing the previous result for an unchanged file."""
+    key = None
+    if isinstance(path_or_buffer, (str, os.PathLike)):
+        stat = os.stat(path_or_buffer)
+        key = (os.path.abspath(path_or_buffer), stat.st_mtime_ns, stat.st_size, max_header_rows)
+        if key in _layout_cache:
+            _layout_cache.move_to_end(key)
+            return _layout_cache[key]
+
+    text, nread = _sniff_text(path_or_buffer)
+    layout = sniff_layout(text, max_header_rows, truncated=nread >= SNIFF_BYTES)
+
+    if key is not None:
+        _layout_cache[key] = layout
+        while len(_layout_cache) > _LAYOUT_CACHE_SIZE:
+            _layout_cache.popitem(last=False)
+    return layout
+
+
+def read_attendance(path_or_buffer, max_header_rows: int = 6, columns=None) -> pd.DataFrame:
     """
     Read an attendance CSV even if the header starts after a few rows.
-    Will try headers from row 0 to max_header_rows - 1.
+
+    Only the first few KB are sniffed to locate the header (within the first
+    `max_header_rows` lines) and the metadata rows, then the file is parsed
+    once. The layout is cached per file version, so repeat loads skip sniffing.
 
     Args:
         path_or_buffer: Path or buffer to the CSV file.
         max_header_rows: How many top rows to check for headers.
+        columns: Optional list of (stripped) column names to parse; the rest
+            of each line is skipped.
 
     Returns:
-        Cleaned DataFrame with stripped column names.
+        Cleaned DataFrame with stripped column names and metadata rows removed.
     """
-    last_exc = None
-    for header in range(max_header_rows):
-        try:
-            if hasattr(path_or_buffer, 'seek'):
-                try:
-                    path_or_buffer.seek(0)
-                except Exception:
-                    pass
-
-            df = pd.read_csv(path_or_buffer, header=header)
-            df.columns = df.columns.astype(str).str.strip()
+    layout = _cached_layout(path_or_buffer, max_header_rows)
+    usecols = None
+    if columns is not None:
+        wanted = set(columns)
+        usecols = lambda col: str(col).strip() in wanted
 
-            # Ensure Roll.No column exists before returning
-            if 'Roll.No' in df.columns:
-                return df
-
-        except Exception as e:
-            last_exc = e
-            continue
-
-    # Fallback if not found in first few rows
     if hasattr(path_or_buffer, 'seek'):
         try:
             path_or_buffer.seek(0)
         except Exception:
             pass
 
-    df = pd.read_csv(path_or_buffer)
+    # Fallback if not found in first few rows
+    if layout['header'] is None:
+        df = pd.read_csv(path_or_buffer, usecols=usecols)
+        df.columns = df.columns.astype(str).str.strip()
+        return df
+
+    skiprows = list(range(layout['header'])) + layout['metadata_rows']
+    df = pd.read_csv(path_or_buffer, skiprows=skiprows, usecols=usecols,
+                     dtype={layout['roll_column']: str})
     df.columns = df.columns.astype(str).str.strip()
+
+    # Metadata rows past the sniffed window
+    if df['Roll.No'].isna().any():
+        df = df[df['Roll.No'].notna()].reset_index(drop=True)
     return df
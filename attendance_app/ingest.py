@@ -0,0 +1,137 @@
+import csv
+import os
+import shutil
+
+import pandas as pd
+
+from attendance_cache import file_version, load_daily_log
+from columnar import extend_sidecar, load_sidecar
+from forecast import ForecastModel, update_model
+from running_totals import RunningTotals, load_running_totals
+from snapshots import open_snapshots
+from upload import atomic_write_csv
+
+# ================================
+# Incremental Daily Ingest
+# ================================
+KEY_COLUMNS = ['Date', 'Roll.No']
+
+
+def _normalize_delta(delta: pd.DataFrame, columns) -> pd.DataFrame:
+    delta = delta.copy()
+    delta.columns = delta.columns.astype(str).str.strip()
+    missing = [c for c in columns if c not in delta.columns]
+    extra = [c for c in delta.columns if c not in columns]
+    if missing or extra:
+        raise ValueError(
+            f"Uploaded columns don't match the attendance log "
+            f"(missing: {missing or 'none'}, unexpected: {extra or 'none'})."
+        )
+    delta = delta[list(columns)]
+    for col in KEY_COLUMNS:
+        delta[col] = delta[col].astype(str).str.strip()
+    # Later rows win within the upload itself.
+    return delta.drop_duplicates(subset=KEY_COLUMNS, keep='last').reset_index(drop=True)
+
+
+def _log_columns(path) -> list:
+    """The log's header, stripped, in the file's own column order."""
+    with open(path, newline='') as f:
+        return [c.strip() for c in next(csv.reader(f), [])]
+
+
+def _append_csv_rows(path, rows: pd.DataFrame):
+    with open(path, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) not in (b'\n', b'\r'):
+                f.write(b'\n')
+    rows.to_csv(path, mode='a', header=False, index=False)
+
+
+def append_days(delta: pd.DataFrame, data_file, base=None) -> dict:
+    """
+    Upsert new daily rows into the attendance log on (Date, Roll.No).
+
+    When every uploaded date is new, the rows are appended to the CSV and the
+    running totals are updated by the delta alone, so the cost scales with
+    the upload. Uploads that touch existing dates replace the matching rows,
+    which rewrites the log. The saved forecast model and the columnar sidecar
+    are updated the same way (appends only; upserts leave them to be rebuilt
+    on next use). `base` is a log with the same rows as `data_file` whose
+    sidecar can be extended instead, e.g. the version it was copied from.
+
+    Returns:
+        Dict with the number of rows `appended` and `replaced` and the
+        `new_dates` added.
+    """
+    if not os.path.exists(data_file):
+        delta = _normalize_delta(delta, delta.columns.astype(str).str.strip())
+        atomic_write_csv(delta, data_file)
+        RunningTotals.from_frame(delta).save(data_file)
+        return {'appended': len(delta), 'replaced': 0, 'new_dates': sorted(delta['Date'].unique())}
+
+    totals = load_running_totals(data_file)
+    # In the log's own column order, which need not start with Date, Roll.No.
+    delta = _normalize_delta(delta, _log_columns(data_file))
+    known_dates = totals.dates
+    new_dates = sorted(set(delta['Date'].unique()) - known_dates)
+
+    if not delta['Date'].isin(known_dates).any():
+        previous_version = file_version(data_file)
+        sidecar = load_sidecar(base or data_file)
+        _append_csv_rows(data_file, delta)
+        if sidecar is not None:
+            extend_sidecar(sidecar, delta, data_file)
+        totals.add_rows(delta)
+        totals.save(data_file)
+        update_model(data_file, delta, previous_version, known_dates)
+        return {'appended': len(delta), 'replaced': 0, 'new_dates': new_dates}
+
+    # Upsert: some dates already exist, so matching rows are replaced.
+    existing = load_daily_log(data_file)
+    existing_keys = pd.MultiIndex.from_frame(existing[KEY_COLUMNS].astype(str))
+    delta_keys = pd.MultiIndex.from_frame(delta[KEY_COLUMNS])
+    is_replaced = existing_keys.isin(delta_keys)
+
+    totals.remove_rows(existing[is_replaced])
+    totals.add_rows(delta)
+    merged = pd.concat([existing[~is_replaced], delta], ignore_index=True)
+    merged = merged.sort_values('Date', kind='stable')
+    atomic_write_csv(merged, data_file)
+    totals.save(data_file)
+    return {'appended': len(delta) - int(is_replaced.sum()), 'replaced': int(is_replaced.sum()),
+            'new_dates': new_dates}
+
+
+def _copy_version(src, dst):
+    """
+    Copy a log and carry its running totals and forecast model over to the copy.
+    The columnar sidecar is not copied; `append_days(..., base=src)` extends it.
+    """
+    totals = RunningTotals.load(src)
+    model = ForecastModel.load(src)
+    shutil.copy2(src, dst)
+    if totals is not None:
+        totals.save(dst)
+    if model is not None and model.version == file_version(src):
+        model.save(dst)
+
+
+def append_days_snapshot(delta: pd.DataFrame, data_file) -> dict:
+    """
+    `append_days` into a new snapshot version of `data_file` (see snapshots.py).
+
+    The published version is copied and the upsert applied to the copy, which
+    is published only if it succeeds; readers pinned to the old version are
+    unaffected. Byte copies (of the published version, and of the new one to
+    the plain path on publish) are the only whole-log costs of an append:
+    the CSV is not re-parsed.
+    """
+    store = open_snapshots(data_file)
+    with store.new_version() as path:
+        base = store.resolve()
+        if base is not None:
+            _copy_version(base, path)
+        return append_days(delta, path, base)
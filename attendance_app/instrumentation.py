@@ -0,0 +1,196 @@
+import json
+import statistics
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+# ================================
+# Per-rerun Stage Timing
+# ================================
+# Each Streamlit rerun runs in its own thread. A rerun that is being profiled
+# gets a `Rerun` in thread-local state; `span()` records into it and is a
+# shared no-op object otherwise, so unprofiled reruns pay one attribute lookup
+# per stage.
+#
+# Peak memory comes from tracemalloc, which is process-wide: it only runs
+# while at least one rerun is profiled, and concurrent sessions' allocations
+# show up in each other's numbers.
+
+HISTORY = 200            # samples kept per stage for p50/p95
+_local = threading.local()
+_lock = threading.Lock()
+_history = {}            # stage -> deque of span records
+_profiled_reruns = 0
+_started_tracemalloc = False
+
+
+class _NullSpan:
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """One timed stage. Set `rows` inside the block to record a row count."""
+
+    def __init__(self, rerun, name, rows=None):
+        self.rerun = rerun
+        self.name = name
+        self.rows = rows
+        self.start = 0.0
+        self.seconds = 0.0
+        self.peak_bytes = 0
+        self._mem_start = 0
+        self._mem_peak = 0
+
+    def __enter__(self):
+        self.rerun._observe_memory()
+        self._mem_start = self._mem_peak = self.rerun._memory_now()
+        self.rerun._stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.start
+        self.rerun._observe_memory()
+        self.rerun._stack.pop()
+        self.peak_bytes = max(self._mem_peak - self._mem_start, 0)
+        self.rerun._record(self)
+        return False
+
+
+class Rerun:
+    """Spans recorded during one script run, in start order."""
+
+    def __init__(self, label: str = ''):
+        self.label = label
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.spans = []
+        self._stack = []
+
+    def _memory_now(self) -> int:
+        return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+    def _observe_memory(self):
+        # Fold the peak since the last observation into every open span, then
+        # reset it, so nested spans each get their own high-water mark.
+        if not tracemalloc.is_tracing():
+            return
+        peak = tracemalloc.get_traced_memory()[1]
+        for span in self._stack:
+            span._mem_peak = max(span._mem_peak, peak)
+        tracemalloc.reset_peak()
+
+    def _record(self, span):
+        record = {
+            'rerun': self.label,
+            'started': self.started,
+            'stage': span.name,
+            'depth': len(self._stack),
+            'offset': span.start - self._t0,
+            'seconds': span.seconds,
+            'peak_bytes': span.peak_bytes,
+            'rows': None if span.rows is None else int(span.rows),
+        }
+        self.spans.append(record)
+        with _lock:
+            _history.setdefault(span.name, deque(maxlen=HISTORY)).append(record)
+
+    def timeline(self) -> list:
+        return sorted(self.spans, key=lambda r: r['offset'])
+
+
+def span(name: str, rows=None):
+    """
+    Context manager timing one stage of the current rerun.
+
+        with span('faculty.load_daily_log') as s:
+            df = load_daily_log(path)
+            s.rows = len(df)
+
+    Does nothing unless the current rerun is profiled.
+    """
+    rerun = getattr(_local, 'rerun', None)
+    if rerun is None:
+        return _NULL_SPAN
+    return Span(rerun, name, rows)
+
+
+def start_rerun(enabled: bool, label: str = '', track_memory: bool = True):
+    """Begin (or, if not `enabled`, skip) profiling the rerun on this thread."""
+    global _profiled_reruns, _started_tracemalloc
+    finish_rerun()
+    if not enabled:
+        return None
+    rerun = Rerun(label)
+    _local.rerun = rerun
+    with _lock:
+        _profiled_reruns += 1
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracemalloc = True
+    return rerun
+
+
+def finish_rerun():
+    """Stop profiling this thread; returns its `Rerun` (or None)."""
+    global _profiled_reruns, _started_tracemalloc
+    rerun = getattr(_local, 'rerun', None)
+    if rerun is None:
+        return None
+    _local.rerun = None
+    with _lock:
+        _profiled_reruns -= 1
+        if _profiled_reruns == 0 and _started_tracemalloc:
+            tracemalloc.stop()
+            _started_tracemalloc = False
+    return rerun
+
+
+# ================================
+# Rolling Stats & Export
+# ================================
+def _percentile(values, q: float) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[q - 1]
+
+
+def stage_stats() -> list:
+    """p50/p95 wall time and peak memory per stage over the last HISTORY samples."""
+    with _lock:
+        history = {name: list(records) for name, records in _history.items()}
+    rows = []
+    for name, records in sorted(history.items()):
+        seconds = [r['seconds'] for r in records]
+        peaks = [r['peak_bytes'] for r in records]
+        rows.append({
+            'stage': name,
+            'count': len(records),
+            'p50_ms': _percentile(seconds, 50) * 1000,
+            'p95_ms': _percentile(seconds, 95) * 1000,
+            'p95_peak_mb': _percentile(peaks, 95) / 1e6,
+        })
+    return rows
+
+
+def export_jsonl() -> str:
+    """Every retained span record, one JSON object per line, oldest rerun first."""
+    with _lock:
+        records = [r for records in _history.values() for r in records]
+    records.sort(key=lambda r: (r['started'], r['offset']))
+    return ''.join(json.dumps(r) + '\n' for r in records)
+
+
+def reset():
+    with _lock:
+        _history.clear()
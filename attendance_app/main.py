@@ -2,8 +2,10 @@ import streamlit as st
 import os
 import pandas as pd
 from auth import login, register
-from student_dashboard import student_dashboard
-from faculty_dashboard import faculty_dashboard
+from attendance_cache import attendance_cache
+import instrumentation
+import snapshots
+from user_store import open_user_store
 
 # ===========================
 # Setup Directories & Files
@@ -15,7 +17,7 @@ users_file = "auth/users.csv"
 if not os.path.exists(users_file):
     pd.DataFrame(columns=['username', 'password', 'role']).to_csv(users_file, index=False)
 
-users_df = pd.read_csv(users_file)
+user_store = open_user_store(users_file)
 
 # ===========================
 # Initialize Session State
@@ -41,33 +43,60 @@ st.title("🎯 AI-Based Attendance & Detention Prediction System")
 with st.sidebar.expander("Debug / Session State", expanded=False):
     if st.checkbox("Show session_state", key="dbg_show_state"):
         st.json({k: v for k, v in st.session_state.items()})
+    if st.checkbox("Show attendance cache stats", key="dbg_show_cache"):
+        st.json(attendance_cache.stats())
+    profiling = st.checkbox("Profile reruns", key="dbg_profile",
+                            value=os.environ.get('ATTENDANCE_PROFILE') == '1')
+    # Filled in after the page has run, once this rerun's spans are known.
+    profile_slot = st.container()
 
-# ===========================
-# If Logged In → Show Dashboard
-# ===========================
-if st.session_state.logged_in and st.session_state.dashboard is not None:
-    if st.session_state.dashboard == "faculty":
-        faculty_dashboard(st.session_state.username)
-    elif st.session_state.dashboard == "student":
-        student_dashboard(st.session_state.username)
+instrumentation.start_rerun(profiling, label=st.session_state.username or 'anonymous')
+# Every data file read during this rerun comes from one published version.
+snapshots.start_rerun()
 
-    if st.sidebar.button("🚪 Logout"):
-        st.session_state.logged_in = False
-        st.session_state.username = ""
-        st.session_state.role = ""
-        st.session_state.dashboard = None
-        st.success("Logged out successfully.")
-        try:
-            st.experimental_rerun()  # fallback for older Streamlit
-        except Exception:
-            pass
+try:
+    # ===========================
+    # If Logged In → Show Dashboard
+    # ===========================
+    if st.session_state.logged_in and st.session_state.dashboard is not None:
+        # Dashboards (and their plotting libraries) are imported on first use so
+        # the login page stays light.
+        if st.session_state.dashboard == "faculty":
+            from faculty_dashboard import faculty_dashboard
+            faculty_dashboard(st.session_state.username)
+        elif st.session_state.dashboard == "student":
+            from student_dashboard import student_dashboard
+            student_dashboard(st.session_state.username)
 
-# ===========================
-# Else → Login or Register
-# ===========================
-else:
-    choice = st.sidebar.radio("Menu", ["Login", "Register"])
-    if choice == "Login":
-        login(users_df)   # ✅ Pass DataFrame, not string path
-    elif choice == "Register":
-        register(users_file)
+        if st.sidebar.button("🚪 Logout"):
+            st.session_state.logged_in = False
+            st.session_state.username = ""
+            st.session_state.role = ""
+            st.session_state.dashboard = None
+            st.success("Logged out successfully.")
+            try:
+                st.experimental_rerun()  # fallback for older Streamlit
+            except Exception:
+                pass
+
+    # ===========================
+    # Else → Login or Register
+    # ===========================
+    else:
+        choice = st.sidebar.radio("Menu", ["Login", "Register"])
+        if choice == "Login":
+            login(user_store)
+        elif choice == "Register":
+            register(user_store)
+finally:
+    rerun = instrumentation.finish_rerun()
+
+if rerun is not None:
+    with profile_slot:
+        st.caption("This rerun")
+        st.dataframe([{k: r[k] for k in ('stage', 'offset', 'seconds', 'peak_bytes', 'rows')}
+                      for r in rerun.timeline()], hide_index=True)
+        st.caption(f"Rolling p50 / p95 (last {instrumentation.HISTORY} per stage)")
+        st.dataframe(instrumentation.stage_stats(), hide_index=True)
+        st.download_button("Export spans (JSON lines)", instrumentation.export_jsonl(),
+                           file_name="attendance_spans.jsonl", mime="application/json")
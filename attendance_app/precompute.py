@@ -0,0 +1,141 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ================================
+# Background Warm-up of Derived Data
+# ================================
+# When a data file gets a new snapshot version, everything the dashboards
+# derive from it (cube, summaries, indexes, forecast, the default chart) is
+# built here on a worker thread and lands in the shared caches. Until that
+# finishes, dashboards keep serving the newest version that is already warm
+# and show a "refreshing" note instead of doing the work inside a rerun.
+#
+# Jobs are keyed by snapshot path, so each version is warmed at most once.
+# Bulk exports started from a rerun go through `submit_export`, on a worker
+# of their own, so a long export never delays the warm-up of a new upload.
+
+POLL_SECONDS = 2.0
+DAILY_LOG, SUMMARY = 'daily_log', 'summary'
+
+log = logging.getLogger(__name__)
+_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('ATTENDANCE_PRECOMPUTE_WORKERS', '1')),
+                               thread_name_prefix='precompute')
+_export_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('ATTENDANCE_EXPORT_WORKERS', '1')),
+                                      thread_name_prefix='export')
+_lock = threading.Lock()
+_jobs = {}      # snapshot path -> Future
+_ready = {}     # logical path -> newest warmed snapshot path
+
+
+def _warm_daily_log(snapshot):
+    # Imported here so the login page doesn't pull in matplotlib.
+    import charts
+    from absence_index import load_absence_index
+    from aggregation import load_student_summary
+    from date_index import load_date_index
+    from forecast import load_forecast
+    from projection import load_counts
+    from running_totals import load_summary_view
+    from streaks import load_streaks
+
+    summary = load_student_summary(snapshot)
+    load_date_index(snapshot)
+    load_absence_index(snapshot)
+    load_forecast(snapshot)
+    load_summary_view(snapshot)
+    load_counts(snapshot)
+    load_streaks(snapshot)
+    charts.attendance_chart(snapshot, summary, charts.default_mode(len(summary)))
+
+
+def _warm_summary(snapshot):
+    from attendance_cache import load_attendance
+    from roll_index import load_roll_index
+
+    load_attendance(snapshot)
+    load_roll_index(snapshot)
+
+
+JOBS = {DAILY_LOG: _warm_daily_log, SUMMARY: _warm_summary}
+
+
+def _run(path, snapshot, kind):
+    JOBS[kind](snapshot)
+    with _lock:
+        # Version ids sort by publication time (see snapshots.py).
+        if path not in _ready or os.path.basename(snapshot) > os.path.basename(_ready[path]):
+            _ready[path] = snapshot
+
+
+def submit(key, fn, *args, executor=None):
+    """
+    Run `fn(*args)` on the precompute worker (or `executor`), once per `key`
+    (a file path the job produces). Returns its Future; `status`/`wait` take
+    the same key.
+    """
+    with _lock:
+        for old in [k for k, f in _jobs.items() if f.done() and not os.path.exists(k)]:
+            del _jobs[old]      # garbage-collected versions, failed jobs
+        future = _jobs.get(key)
+        if future is None:
+            future = (executor or _executor).submit(fn, *args)
+            future.add_done_callback(lambda f: f.exception() and log.error(
+                "Background job failed for %s", key, exc_info=f.exception()))
+            _jobs[key] = future
+        return future
+
+
+def submit_export(key, fn, *args):
+    """`submit` on the export worker."""
+    return submit(key, fn, *args, executor=_export_executor)
+
+
+def schedule(path, snapshot, kind: str = DAILY_LOG):
+    """Warm `snapshot` (a version of `path`) in the background, once. Returns its Future."""
+    return submit(snapshot, _run, os.path.abspath(path), snapshot, kind)
+
+
+def status(key):
+    """'ready', 'refreshing', 'failed', or None if never scheduled."""
+    with _lock:
+        future = _jobs.get(key)
+    if future is None:
+        return None
+    if not future.done():
+        return 'refreshing'
+    return 'failed' if future.exception() is not None else 'ready'
+
+
+def serving(path, snapshot, kind: str = DAILY_LOG):
+    """
+    Which version of `path` a dashboard should show, given the pinned `snapshot`.
+
+    Returns:
+        (snapshot path to read, refreshing). The path is `snapshot` once it is
+        warm (or its warm-up failed, so errors surface in the dashboard), else
+        the newest warm version, or None if no version is warm yet.
+    """
+    state = status(snapshot)
+    if state in ('ready', 'failed'):
+        return snapshot, False
+    schedule(path, snapshot, kind)
+    with _lock:
+        previous = _ready.get(os.path.abspath(path))
+    if previous is not None and os.path.exists(previous):
+        return previous, True
+    return None, True
+
+
+def wait(key, timeout: float = POLL_SECONDS) -> bool:
+    """Block up to `timeout` seconds for `key`'s job (e.g. a snapshot's warm-up); True if it finished."""
+    with _lock:
+        future = _jobs.get(key)
+    if future is None:
+        return False
+    try:
+        future.result(timeout=timeout)
+    except Exception:
+        pass
+    return future.done()
@@ -0,0 +1,271 @@
+import csv
+import hashlib
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from aggregation import DETENTION_THRESHOLD
+from attendance_cache import get_derived
+from forecast import DEFAULT_TERM_DAYS
+from running_totals import load_summary_view
+
+# ================================
+# What-if Projections
+# ================================
+# For every (student, subject) at once, from the exact counts in the running
+# totals:
+#
+#   Classes_Needed    consecutive classes to attend to get back to the threshold
+#   Safe_Bunks        classes that can be missed in a row and stay at/above it
+#   Must_Attend       of the remaining classes, how many must be attended to
+#                     finish the term at/above it (Reachable: that many are left)
+#   Can_Miss          how many of the remaining classes can still be missed
+#   Projected_Percent end-of-term % if the student keeps attending at the
+#                     scenario's rate
+#
+# plus the same numbers for each student overall. Comparisons are done as
+# 100 * attended vs threshold * held, so whole-number thresholds are exact.
+#
+# Exports are built BATCH_STUDENTS students at a time and streamed to a file
+# next to the snapshot, so the full long table never exists in memory.
+
+BATCH_STUDENTS = 5000
+OVERALL = 'Overall'
+EXPORTS_SUFFIX = '.exports'
+FORMATS = {'csv': 'text/csv',
+           'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'}
+XLSX_MAX_ROWS = 1_048_576       # per sheet, including the header
+COLUMNS = ['Roll.No', 'Subject', 'Attended', 'Held', 'Percent', 'Classes_Needed', 'Safe_Bunks',
+           'Remaining', 'Must_Attend', 'Can_Miss', 'Reachable', 'Projected_Percent', 'Projected_Detained']
+
+
+class Scenario:
+    """
+    Assumptions about the rest of the term.
+
+    `remaining` classes per subject default to one per teaching day up to
+    `term_days` (as in the forecast); `overrides` maps subjects to explicit
+    counts. `rate` is the share of remaining classes attended, or None for
+    each student's own rate so far in that subject.
+    """
+
+    def __init__(self, term_days: int = DEFAULT_TERM_DAYS, overrides=None, rate=None,
+                 threshold: float = DETENTION_THRESHOLD):
+        if not 0 < threshold < 100:
+            raise ValueError(f"threshold must be between 0 and 100, got {threshold}")
+        if rate is not None and not 0 <= rate <= 1:
+            raise ValueError(f"rate must be between 0 and 1, got {rate}")
+        self.term_days = int(term_days)
+        self.overrides = {s: max(int(n), 0) for s, n in (overrides or {}).items()}
+        self.rate = None if rate is None else float(rate)
+        self.threshold = threshold
+
+    def remaining(self, subjects, held) -> np.ndarray:
+        """Classes still to be held per subject."""
+        remaining = np.maximum(self.term_days - np.asarray(held, dtype=np.int64), 0)
+        for j, subject in enumerate(subjects):
+            if subject in self.overrides:
+                remaining[j] = self.overrides[subject]
+        return remaining
+
+    def key(self) -> tuple:
+        return (self.term_days, tuple(sorted(self.overrides.items())), self.rate, self.threshold)
+
+
+def project(attended, held, remaining, rate=None, threshold: float = DETENTION_THRESHOLD) -> dict:
+    """
+    What-if numbers for any grid of counts (`held` and `remaining` broadcast
+    against `attended`, e.g. one value per subject).
+
+    `rate` is a scalar or array share of the remaining classes attended; None
+    uses attended / held (1.0 where nothing was held yet).
+
+    Returns:
+        dict of arrays shaped like `attended`, keyed by the COLUMNS names
+        (plus the fractional `Projected_Attended`).
+    """
+    a = np.asarray(attended, dtype=np.int64)
+    h = np.broadcast_to(np.asarray(held, dtype=np.int64), a.shape)
+    r = np.broadcast_to(np.asarray(remaining, dtype=np.int64), a.shape)
+    t = threshold
+
+    surplus = 100 * a - t * h                   # >= 0: at or above the threshold now
+    final_held = h + r
+    must = np.ceil(np.maximum(t * final_held - 100 * a, 0) / 100).astype(np.int64)
+    reachable = must <= r
+    if rate is None:
+        rate = np.divide(a, h, out=np.ones(a.shape), where=h > 0)
+    projected = a + np.asarray(rate, dtype=float) * r
+    projected_percent = np.divide(projected * 100, final_held, out=np.zeros(a.shape), where=final_held > 0)
+    return {
+        'Attended': a,
+        'Held': h,
+        'Percent': np.divide(a * 100.0, h, out=np.zeros(a.shape), where=h > 0),
+        'Classes_Needed': np.ceil(np.maximum(-surplus, 0) / (100 - t)).astype(np.int64),
+        'Safe_Bunks': np.floor(np.maximum(surplus, 0) / t).astype(np.int64),
+        'Remaining': r,
+        'Must_Attend': must,
+        'Can_Miss': np.where(reachable, r - must, 0),
+        'Reachable': reachable,
+        'Projected_Percent': projected_percent,
+        'Projected_Detained': projected_percent < t,
+        'Projected_Attended': projected,
+    }
+
+
+def project_students(rolls, subjects, attended, held, scenario: Scenario) -> pd.DataFrame:
+    """
+    One row per (student, subject) plus an OVERALL row per student, in COLUMNS layout.
+
+    `attended` is students x subjects; `held` is per subject.
+    """
+    rolls = np.asarray(rolls)
+    attended = np.asarray(attended, dtype=np.int64).reshape(len(rolls), len(subjects))
+    held = np.asarray(held, dtype=np.int64)
+    remaining = scenario.remaining(subjects, held)
+    t = scenario.threshold
+    per_subject = project(attended, held, remaining, scenario.rate, t)
+
+    # Overall: summed counts, with the projection summed from the subjects
+    # (each at its own rate) rather than re-projected at the overall rate.
+    overall = project(attended.sum(axis=1), held.sum(), remaining.sum(), 0.0, t)
+    final_held = held.sum() + remaining.sum()
+    projected = per_subject['Projected_Attended'].sum(axis=1)
+    overall['Projected_Percent'] = (projected * 100 / final_held if final_held
+                                    else np.zeros(len(rolls)))
+    overall['Projected_Detained'] = overall['Projected_Percent'] < t
+
+    n_cols = len(subjects) + 1
+    table = {
+        'Roll.No': np.repeat(rolls.astype(object), n_cols),
+        'Subject': np.tile(np.asarray(list(subjects) + [OVERALL], dtype=object), len(rolls)),
+    }
+    for column in COLUMNS[2:]:
+        table[column] = np.concatenate([per_subject[column], overall[column][:, None]], axis=1).ravel()
+    return pd.DataFrame(table, columns=COLUMNS)
+
+
+# ================================
+# Cohort Counts
+# ================================
+def load_counts(log_path):
+    """(rolls, subjects, attended, held) arrays of the log's summary view, built once per version."""
+    def build():
+        view = load_summary_view(log_path)
+        rolls, attended, held = view.counts()
+        return rolls, list(view.subjects), attended, held
+    return get_derived(log_path, 'projection_counts', build)
+
+
+def projection_batches(counts, scenario: Scenario, batch_students: int = BATCH_STUDENTS, students=None):
+    """
+    Yield `project_students` frames for `batch_students` students at a time.
+
+    `students` optionally selects (and orders) positions into the counts.
+    """
+    rolls, subjects, attended, held = counts
+    order = np.arange(len(rolls)) if students is None else np.asarray(students)
+    for start in range(0, len(order), batch_students):
+        idx = order[start:start + batch_students]
+        yield project_students(rolls[idx], subjects, attended[idx], held, scenario)
+
+
+def at_risk(counts, scenario: Scenario, limit: int = 50) -> pd.DataFrame:
+    """Rows for the `limit` students with the lowest projected overall %, lowest first."""
+    rolls, subjects, attended, held = counts
+    if not len(rolls):
+        return pd.DataFrame(columns=COLUMNS)
+    remaining = scenario.remaining(subjects, held)
+    per_subject = project(attended, held, remaining, scenario.rate, scenario.threshold)
+    final_held = held.sum() + remaining.sum()
+    overall = per_subject['Projected_Attended'].sum(axis=1) / max(final_held, 1)
+    worst = np.argsort(overall, kind='stable')[:limit]
+    frames = list(projection_batches(counts, scenario, students=worst))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUMNS)
+
+
+# ================================
+# Streaming Export
+# ================================
+def xlsx_available() -> bool:
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def write_csv(batches, out):
+    """Write frames from `batches` to the text stream `out` as one CSV, one batch at a time."""
+    header = True
+    for batch in batches:
+        batch.to_csv(out, header=header, index=False, float_format='%.2f')
+        header = False
+    if header:
+        csv.writer(out).writerow(COLUMNS)
+
+
+def write_xlsx(batches, path):
+    """
+    Write frames from `batches` to an .xlsx workbook in write-only (streaming)
+    mode, starting a new sheet whenever one is full.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ValueError("XLSX export needs openpyxl (pip install openpyxl); use CSV instead.")
+    book = Workbook(write_only=True)
+    sheet, rows = None, XLSX_MAX_ROWS
+    for batch in batches:
+        batch = batch.round({'Percent': 2, 'Projected_Percent': 2})
+        for row in batch.itertuples(index=False):
+            if rows >= XLSX_MAX_ROWS:
+                sheet = book.create_sheet(f"Projection {len(book.worksheets) + 1}")
+                sheet.append(COLUMNS)
+                rows = 1
+            sheet.append([v.item() if isinstance(v, np.generic) else v for v in row])
+            rows += 1
+    if sheet is None:
+        book.create_sheet("Projection 1").append(COLUMNS)
+    book.save(path)
+
+
+def export_path(log_path, scenario: Scenario, fmt: str = 'csv') -> str:
+    """Where the export of `log_path` (a snapshot) under `scenario` is written."""
+    digest = hashlib.sha1(repr(scenario.key()).encode()).hexdigest()[:12]
+    return os.path.join(os.fspath(log_path) + EXPORTS_SUFFIX, f"projection-{digest}.{fmt}")
+
+
+def export(log_path, scenario: Scenario, fmt: str = 'csv') -> str:
+    """
+    Write the whole cohort's projection for the daily log at `log_path` (a
+    snapshot, so the export is removed with it) unless already written.
+
+    Returns:
+        Path of the finished export.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {sorted(FORMATS)}.")
+    target = export_path(log_path, scenario, fmt)
+    if os.path.exists(target):
+        return target
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = f"{target}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        batches = projection_batches(load_counts(log_path), scenario)
+        if fmt == 'csv':
+            with open(tmp, 'w', newline='') as out:
+                write_csv(batches, out)
+        else:
+            write_xlsx(batches, tmp)
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return target
+
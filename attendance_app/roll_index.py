@@ -0,0 +1,55 @@
+from itertools import islice
+
+import numpy as np
+
+from attendance_cache import get_derived
+from helpers import read_attendance
+
+
+# ================================
+# Roll.No -> Row Offset Index
+# ================================
+def normalize_roll(roll) -> str:
+    return str(roll).strip()
+
+
+class RollIndex:
+    """
+    Maps normalized roll numbers to their row offsets in `read_attendance(path)`.
+
+    Built from the Roll.No column alone, so membership checks never need the
+    full attendance frame.
+    """
+
+    def __init__(self, rolls):
+        self.rolls = [normalize_roll(r) for r in rolls]
+        self._offsets = {}
+        for i, roll in enumerate(self.rolls):
+            self._offsets.setdefault(roll, []).append(i)
+
+    def __contains__(self, roll):
+        return normalize_roll(roll) in self._offsets
+
+    def __len__(self):
+        return len(self._offsets)
+
+    @property
+    def nbytes(self) -> int:
+        # Rough: one short str plus a dict slot and a list per roll.
+        return 200 * len(self.rolls)
+
+    def offsets(self, roll) -> list:
+        """Row offsets for `roll` (empty if unknown)."""
+        return self._offsets.get(normalize_roll(roll), [])
+
+    def sample(self, n: int = 10) -> list:
+        """The first `n` distinct roll numbers, in file order."""
+        return list(islice(self._offsets, n))
+
+
+def load_roll_index(path) -> RollIndex:
+    """Roll index for a summary-layout attendance file, built once per data version."""
+    def build():
+        rolls = read_attendance(path, columns=['Roll.No'])['Roll.No']
+        return RollIndex(np.asarray(rolls, dtype=object))
+    return get_derived(path, 'roll_index', build)
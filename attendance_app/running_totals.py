@@ -0,0 +1,170 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from attendance_cache import file_version, get_derived, load_daily_log
+
+# ================================
+# Running Per-Student / Per-Subject Counters
+# ================================
+# Kept next to the daily log as `<file>.totals.json` and stamped with the
+# log's data version, so a stale file (log replaced by other means) is
+# detected and rebuilt instead of trusted.
+#
+# The totals double as the materialized per-student summary behind the
+# student dashboard: exact attended / held counts per subject, maintained
+# by every ingest, so no separate summary file has to be regenerated.
+
+TOTALS_SUFFIX = '.totals.json'
+
+
+def totals_path(log_path) -> str:
+    return os.fspath(log_path) + TOTALS_SUFFIX
+
+
+class RunningTotals:
+    """
+    Attended counts per (Roll.No, subject) plus the dates each subject was held.
+
+    Updated by the delta of each ingest instead of recounting the whole term.
+    """
+
+    def __init__(self, subjects, held_dates=None, attended=None, version=None):
+        self.subjects = list(subjects)
+        self.held_dates = {s: set(held_dates.get(s, ())) if held_dates else set() for s in self.subjects}
+        self.attended = attended or {}    # roll -> {subject: count}
+        self.version = version
+
+    @property
+    def dates(self) -> set:
+        return set().union(*self.held_dates.values()) if self.held_dates else set()
+
+    def held(self, subject) -> int:
+        return len(self.held_dates[subject])
+
+    @property
+    def nbytes(self) -> int:
+        # Rough: a small dict of ints per student.
+        return 100 * len(self.attended) * max(len(self.subjects), 1)
+
+    # ----- summary view -----
+    def __contains__(self, roll):
+        return str(roll).strip() in self.attended
+
+    def student(self, roll):
+        """Per-subject Attended / Held / Percent for `roll`, or None if not in the log."""
+        counts = self.attended.get(str(roll).strip())
+        if counts is None:
+            return None
+        attended = np.array([counts.get(s, 0) for s in self.subjects], dtype=np.int64)
+        held = np.array([self.held(s) for s in self.subjects], dtype=np.int64)
+        return pd.DataFrame({
+            'Subject': self.subjects,
+            'Attended': attended,
+            'Held': held,
+            'Percent': np.divide(attended * 100.0, held, out=np.zeros(len(held)), where=held > 0),
+        })
+
+    def counts(self):
+        """
+        Every student's counts as arrays.
+
+        Returns:
+            (sorted roll numbers, students x subjects attended counts,
+            per-subject classes held)
+        """
+        rolls = sorted(self.attended)
+        attended = np.array([[self.attended[r].get(s, 0) for s in self.subjects] for r in rolls],
+                            dtype=np.int64).reshape(len(rolls), len(self.subjects))
+        held = np.array([self.held(s) for s in self.subjects], dtype=np.int64)
+        return np.asarray(rolls, dtype=str), attended, held
+
+    def to_frame(self) -> pd.DataFrame:
+        """Every student in the data/Attendance.csv layout, with exact Attended / Total counts."""
+        rolls, counts, held = self.counts()
+        total = int(held.sum())
+        df = pd.DataFrame(counts, columns=self.subjects)
+        df.insert(0, 'Roll.No', rolls.astype(object))
+        df['Attended'] = counts.sum(axis=1)
+        df['Total'] = total
+        df['Percent'] = df['Attended'] / total * 100 if total else 0.0
+        return df
+
+    # ----- updates -----
+    def _apply(self, rows: pd.DataFrame, sign: int):
+        if rows.empty:
+            return
+        counts = (rows[self.subjects] == 'P').groupby(rows['Roll.No'].astype(str)).sum()
+        for roll, row in zip(counts.index, counts.to_numpy()):
+            per_subject = self.attended.setdefault(roll, dict.fromkeys(self.subjects, 0))
+            for subject, n in zip(self.subjects, row):
+                per_subject[subject] = per_subject.get(subject, 0) + sign * int(n)
+
+    def add_rows(self, rows: pd.DataFrame):
+        """Count new log rows (Date, Roll.No, subjects...)."""
+        self._apply(rows, +1)
+        dates = rows['Date'].astype(str)
+        for subject in self.subjects:
+            self.held_dates[subject].update(dates[rows[subject].notna()].unique())
+
+    def remove_rows(self, rows: pd.DataFrame):
+        """Un-count rows that an upsert is about to replace."""
+        self._apply(rows, -1)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, version=None):
+        # Like the cube, the last row for a (Date, Roll.No) wins.
+        df = df[~df[['Date', 'Roll.No']].astype(str).duplicated(keep='last')]
+        totals = cls([c for c in df.columns if c not in ('Date', 'Roll.No')], version=version)
+        totals.add_rows(df)
+        return totals
+
+    # ----- persistence -----
+    def save(self, log_path):
+        self.version = file_version(log_path)
+        data = {
+            'version': list(self.version),
+            'subjects': self.subjects,
+            'held_dates': {s: sorted(d) for s, d in self.held_dates.items()},
+            'attended': self.attended,
+        }
+        target = totals_path(log_path)
+        tmp = target + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, target)
+
+    @classmethod
+    def load(cls, log_path):
+        """Totals for `log_path`, or None if missing or stamped with another data version."""
+        try:
+            with open(totals_path(log_path)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        version = tuple(data.get('version', ()))
+        if version != file_version(log_path):
+            return None
+        return cls(data['subjects'], data['held_dates'], data['attended'], version)
+
+
+def load_running_totals(log_path) -> RunningTotals:
+    """Saved totals for the log, rebuilt from the full log if missing or stale."""
+    totals = RunningTotals.load(log_path)
+    if totals is None:
+        totals = RunningTotals.from_frame(load_daily_log(log_path))
+        totals.save(log_path)
+    return totals
+
+
+def load_summary_view(log_path) -> RunningTotals:
+    """The log's running totals as a read-only summary view, loaded once per data version."""
+    return get_derived(log_path, 'summary_view', lambda: load_running_totals(log_path))
+
+
+def load_summary_csv(log_path) -> bytes:
+    """The summary view as Attendance.csv-layout CSV bytes, rendered once per data version."""
+    return get_derived(log_path, 'summary_csv',
+                       lambda: load_summary_view(log_path).to_frame().to_csv(index=False).encode())
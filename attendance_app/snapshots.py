@@ -0,0 +1,258 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from attendance_cache import attendance_cache
+
+# ================================
+# Immutable Data Snapshots
+# ================================
+# Every write to a data file produces a new version in `<file>.snapshots/`:
+#
+#   <version><ext>       the data, never modified once published
+#   <version><ext>.*     sidecars derived from it (columnar, totals, forecast)
+#   CURRENT              the published version id and its mtime/size
+#
+# `<file>` itself is a copy of the published version (same mtime) for tools
+# that read the plain path. It is a separate file, never a link, so writing
+# it - in place or by replacing it - can't change a published version; a
+# plain file that no longer matches its version's mtime/size is imported as
+# a new version. Version ids start with a nanosecond timestamp, so they sort
+# in publication order.
+#
+# A Streamlit rerun pins one version per file (see `pinned`) and reads only
+# that, so it never mixes data from before and after an upload. Caches are
+# keyed by the snapshot path (see attendance_cache.file_version), so a new
+# version gets new keys; publishing also drops older versions' entries from
+# every registered cache. The version being replaced keeps its entries so it
+# can still be served while the new one is warmed (see precompute.py).
+
+SNAPSHOT_SUFFIX = '.snapshots'
+CURRENT_FILE = 'CURRENT'
+RETENTION_SECONDS = 15 * 60     # superseded versions are kept this long for pinned readers
+
+_caches = [attendance_cache]
+
+
+def register_cache(cache):
+    """Have `cache` (an AttendanceCache) drop superseded versions on publish."""
+    _caches.append(cache)
+
+
+def _new_version_id() -> str:
+    return f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+
+
+def _version_time(version: str) -> float:
+    return int(version.split('-', 1)[0]) / 1e9
+
+
+def _stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _same_file(a, b) -> bool:
+    """True if `a` is still the `_mirror` of `b`: same size and mtime."""
+    try:
+        return _stamp(a) == _stamp(b)
+    except OSError:
+        return False
+
+
+def _mirror(src, dst):
+    """Atomically replace `dst` with a copy of `src` that keeps its mtime."""
+    tmp = f"{dst}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class SnapshotStore:
+    """Published, immutable versions of one data file."""
+
+    def __init__(self, path, retention: float = RETENTION_SECONDS):
+        self.path = os.path.abspath(path)
+        self.root = self.path + SNAPSHOT_SUFFIX
+        self.ext = os.path.splitext(self.path)[1]
+        self.retention = retention
+        self._lock = threading.RLock()          # CURRENT pointer and the plain file
+        self._write_lock = threading.Lock()     # one writer at a time
+
+    def version_path(self, version: str) -> str:
+        return os.path.join(self.root, version + self.ext)
+
+    def _pointer(self):
+        """(published version id, its (mtime_ns, size) when published); (None, None) if none."""
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as f:
+                lines = f.read().split()
+        except OSError:
+            return None, None
+        if not lines:
+            return None, None
+        stamp = tuple(int(n) for n in lines[1:3]) if len(lines) >= 3 else None
+        return lines[0], stamp
+
+    def current(self):
+        """The published version id, or None."""
+        return self._pointer()[0]
+
+    def versions(self) -> list:
+        """Version ids with data in the store, oldest first."""
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return []
+        stems = [n[:len(n) - len(self.ext)] for n in names if n.endswith(self.ext)]
+        return sorted(s for s in stems if s and '.' not in s and s != CURRENT_FILE)
+
+    def resolve(self):
+        """
+        Path of the published snapshot, or None if there is no data.
+
+        A plain file written outside the store (e.g. copied into data/ by hand)
+        is imported as a new version first.
+        """
+        with self._lock:
+            version, stamp = self._pointer()
+            snapshot = self.version_path(version) if version else None
+            live = os.path.exists(self.path)
+            if snapshot and os.path.exists(snapshot) and (not live or (
+                    _same_file(self.path, snapshot) and stamp in (None, _stamp(snapshot)))):
+                return snapshot
+            if not live:
+                return None
+            version = _new_version_id()
+            os.makedirs(self.root, exist_ok=True)
+            tmp = self.version_path(version) + '.tmp'
+            shutil.copy2(self.path, tmp)
+            os.replace(tmp, self.version_path(version))
+        return self.publish(version)
+
+    @contextmanager
+    def new_version(self):
+        """
+        Yield the path for the next version; it is published if the block
+        finishes and discarded if it raises. Writers are serialized.
+        """
+        with self._write_lock:
+            os.makedirs(self.root, exist_ok=True)
+            version = _new_version_id()
+            target = self.version_path(version)
+            try:
+                yield target
+            except BaseException:
+                self._remove(version)
+                raise
+            if not os.path.exists(target):
+                self._remove(version)
+                return
+            self.publish(version)
+
+    def publish(self, version: str) -> str:
+        """Make `version` current, refresh the plain file and drop superseded cache entries."""
+        snapshot = self.version_path(version)
+        with self._lock:
+            previous = self.current()
+            keep = {snapshot, self.version_path(previous) if previous else None}
+            pointer = os.path.join(self.root, CURRENT_FILE)
+            mtime_ns, size = _stamp(snapshot)
+            with open(pointer + '.tmp', 'w') as f:
+                f.write(f"{version}\n{mtime_ns} {size}\n")
+            os.replace(pointer + '.tmp', pointer)
+            _mirror(snapshot, self.path)
+
+        prefix = self.root + os.sep
+        for cache in _caches:
+            cache.invalidate(lambda key: isinstance(key[0], str) and key[0].startswith(prefix)
+                             and key[0] not in keep)
+        _repin(self.path, snapshot)
+        self.gc()
+        return snapshot
+
+    def gc(self, now=None) -> list:
+        """Delete versions superseded more than `retention` seconds ago. Returns their ids."""
+        now = time.time() if now is None else now
+        current = self.current()
+        versions = self.versions()
+        removed = []
+        for version, successor in zip(versions, versions[1:]):
+            if version == current:
+                continue
+            if now - _version_time(successor) > self.retention:
+                self._remove(version)
+                removed.append(version)
+        return removed
+
+    def _remove(self, version: str):
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return
+        for name in names:
+            if name == version + self.ext or name.startswith(version + self.ext + '.'):
+                path = os.path.join(self.root, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_snapshots(path) -> SnapshotStore:
+    """The process-wide SnapshotStore for `path`."""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = SnapshotStore(key)
+        return _stores[key]
+
+
+# ================================
+# Per-rerun Pinning
+# ================================
+_local = threading.local()
+
+
+def start_rerun():
+    """Forget this thread's pins; the next `pinned` call per file pins afresh."""
+    _local.pins = {}
+
+
+def pinned(path):
+    """
+    Snapshot path of `path` for this rerun (None if there is no data).
+
+    The first call in a rerun pins the published version; later calls return
+    the same one, except that a version published by this thread replaces it.
+    Outside a rerun (no `start_rerun`), always the published version.
+    """
+    pins = getattr(_local, 'pins', None)
+    key = os.path.abspath(path)
+    if pins is None:
+        return open_snapshots(path).resolve()
+    if key not in pins or pins[key] is None:
+        pins[key] = open_snapshots(path).resolve()
+    return pins[key]
+
+
+def _repin(path, snapshot):
+    pins = getattr(_local, 'pins', None)
+    if pins is not None:
+        pins[path] = snapshot
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+from attendance_cache import get_derived
+from date_index import load_date_index
+
+# ================================
+# Absence Streaks & Weekday Patterns
+# ================================
+# Computed for the whole cohort at once from the date-ordered P/A grid:
+#
+#   absent day    a date on which the student had marked classes and
+#                 attended none of them
+#   streak        a run of consecutive absent days (consecutive log dates,
+#                 so weekends and holidays don't break a streak)
+#   profile       absences / classes held per weekday x subject
+
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+MIN_STREAK = 3
+PATTERN_RATE = 0.75      # share of a weekday's classes missed to count as a pattern
+PATTERN_MIN_HELD = 3     # ... out of at least this many
+
+
+def _weekdays(days) -> np.ndarray:
+    # 1970-01-01 was a Thursday.
+    return (days.astype('datetime64[D]').astype(np.int64) + 3) % 7
+
+
+def absence_runs(day_absent: np.ndarray):
+    """
+    Run-length encode the True runs of each row of a students x dates grid.
+
+    Returns:
+        (row, start, length) arrays, one entry per run, in row-major order.
+    """
+    n_rows, n_dates = day_absent.shape
+    padded = np.zeros((n_rows, n_dates + 2), dtype=np.int8)
+    padded[:, 1:-1] = day_absent
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, stops = np.nonzero(edges == -1)     # same row-major order as the starts
+    return rows, starts, stops - starts
+
+
+class StreakAnalytics:
+    """Per-student streak stats, every streak, and weekday x subject absence profiles."""
+
+    def __init__(self, index):
+        present, recorded = index.present, index.recorded
+        n_students, n_dates, n_subjects = present.shape
+        self.rolls = index.rolls
+        self.subjects = list(index.subjects)
+        self.labels = index.labels
+
+        day_absent = recorded.any(axis=2) & ~present.any(axis=2)
+        rows, starts, lengths = absence_runs(day_absent)
+        longest = np.zeros(n_students, dtype=np.int64)
+        np.maximum.at(longest, rows, lengths)
+        current = np.zeros(n_students, dtype=np.int64)
+        ongoing = starts + lengths == n_dates
+        current[rows[ongoing]] = lengths[ongoing]
+        self._runs = (rows, starts, lengths)
+
+        self._students = pd.DataFrame({
+            'Roll.No': self.rolls.astype(object),
+            'Absent_Days': day_absent.sum(axis=1),
+            'Longest_Streak': longest,
+            'Current_Streak': current,
+        })
+
+        # students x weekdays x subjects
+        weekday = _weekdays(index.days)
+        self.absent = np.zeros((n_students, 7, n_subjects), dtype=np.int32)
+        self.held = np.zeros((n_students, 7, n_subjects), dtype=np.int32)
+        for w in np.unique(weekday):
+            on_day = weekday == w
+            rec = recorded[:, on_day]
+            self.held[:, w] = rec.sum(axis=1)
+            self.absent[:, w] = (rec & ~present[:, on_day]).sum(axis=1)
+
+    @property
+    def nbytes(self) -> int:
+        return (self.absent.nbytes + self.held.nbytes + sum(a.nbytes for a in self._runs)
+                + int(self._students.memory_usage(deep=True).sum()))
+
+    def students(self, min_length: int = MIN_STREAK) -> pd.DataFrame:
+        """Per-student Absent_Days, Streaks (of at least `min_length` days), Longest_ and Current_Streak."""
+        rows, _, lengths = self._runs
+        table = self._students.copy()
+        table.insert(2, 'Streaks', np.bincount(rows[lengths >= min_length], minlength=len(table)))
+        return table
+
+    def streaks(self, min_length: int = MIN_STREAK) -> pd.DataFrame:
+        """Every streak of at least `min_length` absent days, longest first."""
+        rows, starts, lengths = self._runs
+        keep = lengths >= min_length
+        rows, starts, lengths = rows[keep], starts[keep], lengths[keep]
+        labels = self.labels.astype(object)
+        table = pd.DataFrame({
+            'Roll.No': self.rolls.astype(object)[rows],
+            'From': labels[starts],
+            'To': labels[starts + lengths - 1],
+            'Days': lengths,
+        })
+        return table.sort_values(['Days', 'Roll.No'], ascending=[False, True], kind='stable',
+                                 ignore_index=True)
+
+    def patterns(self, min_rate: float = PATTERN_RATE, min_held: int = PATTERN_MIN_HELD) -> pd.DataFrame:
+        """(student, weekday, subject) combinations missed at least `min_rate` of the time."""
+        rate = np.divide(self.absent, self.held, out=np.zeros(self.absent.shape), where=self.held > 0)
+        s, w, j = np.nonzero((self.held >= min_held) & (rate >= min_rate))
+        table = pd.DataFrame({
+            'Roll.No': self.rolls.astype(object)[s],
+            'Weekday': np.asarray(WEEKDAYS, dtype=object)[w],
+            'Subject': np.asarray(self.subjects, dtype=object)[j],
+            'Missed': self.absent[s, w, j],
+            'Held': self.held[s, w, j],
+            'Rate': rate[s, w, j] * 100,
+        })
+        return table.sort_values(['Rate', 'Missed'], ascending=False, kind='stable', ignore_index=True)
+
+    def cohort_profile(self) -> pd.DataFrame:
+        """Absence % of the whole cohort per weekday (rows) and subject (columns)."""
+        absent, held = self.absent.sum(axis=0), self.held.sum(axis=0)
+        days = held.sum(axis=1) > 0
+        rate = np.divide(absent * 100.0, held, out=np.zeros(held.shape), where=held > 0)
+        return pd.DataFrame(rate[days], index=np.asarray(WEEKDAYS)[days], columns=self.subjects)
+
+    def profile(self, roll):
+        """One student's absence % per weekday x subject, or None if not in the log."""
+        i = int(np.searchsorted(self.rolls, str(roll)))
+        if i >= len(self.rolls) or self.rolls[i] != str(roll):
+            return None
+        absent, held = self.absent[i], self.held[i]
+        days = held.sum(axis=1) > 0
+        rate = np.divide(absent * 100.0, held, out=np.zeros(held.shape), where=held > 0)
+        return pd.DataFrame(rate[days], index=np.asarray(WEEKDAYS)[days], columns=self.subjects)
+
+
+def load_streaks(path):
+    """Streak analytics for the daily log at `path` (None if its dates don't parse), once per version."""
+    def build():
+        index = load_date_index(path)
+        return StreakAnalytics(index) if index is not None else None
+    return get_derived(path, 'streaks', build)
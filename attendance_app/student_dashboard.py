@@ -1,29 +1,101 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import os
 import plotly.express as px
-from helpers import read_attendance
+from attendance_cache import load_attendance
+from roll_index import load_roll_index
+from running_totals import load_summary_view
+from forecast import load_forecast
+from helpers import classes_needed
+import projection
+from instrumentation import span
+from snapshots import pinned
+import precompute
+
+SUMMARY_FILE = "data/attendance.csv"
+LOG_FILE = "data/faculty_attendance_20days.csv"
 
-def student_dashboard(username):
-    st.header(f"🎓 Welcome, {username}")
-    data_file = "data/attendance.csv"
 
-    if not os.path.exists(data_file):
+def _summary_file_record(username):
+    """
+    (percent, total, attended, subject_df) from the hand-exported summary file,
+    or None after showing why not. Attended is reconstructed from the rounded
+    Percent column, so it is only approximate.
+    """
+    data_file = pinned(SUMMARY_FILE)
+    if data_file is None:
         st.warning("Attendance data not available yet.")
-        return
+        return None
+    data_file, _ = precompute.serving(SUMMARY_FILE, data_file, precompute.SUMMARY)
+    if data_file is None:
+        st.info("⏳ Refreshing attendance records…")
+        precompute.wait(pinned(SUMMARY_FILE))
+        st.rerun()
 
-    df = read_attendance(data_file)
-    df.columns = df.columns.str.strip()
+    with span('student.load_attendance') as s:
+        df = load_attendance(data_file)
+        s.rows = len(df)
 
     if 'Roll.No' not in df.columns:
         st.error("CSV does not contain 'Roll.No' column.")
-        return
+        return None
 
-    student = df[df['Roll.No'].astype(str) == str(username)]
+    with span('student.lookup'):
+        student = df.iloc[load_roll_index(data_file).offsets(username)]
     if student.empty:
         st.info("No records found for your roll number.")
-        return
+        return None
+
+    percent = student['Percent'].values[0] if 'Percent' in df.columns else None
+    total_classes = student['Total'].values[0] if 'Total' in df.columns else None
+    attended_classes = (percent / 100) * total_classes if (percent is not None and total_classes is not None) else None
+
+    exclude_cols = ['Sl.No', 'Roll.No', 'Total', 'Percent']
+    subject_cols = [col for col in df.columns if col not in exclude_cols]
+    subject_df = None
+    if subject_cols:
+        subject_data = student[subject_cols].select_dtypes(include=[np.number]).iloc[0]
+        subject_df = pd.DataFrame({
+            'Subject': subject_data.index,
+            'Attendance': subject_data.values
+        })
+    return percent, total_classes, attended_classes, subject_df
+
+
+def student_dashboard(username):
+    st.header(f"🎓 Welcome, {username}")
+
+    # The daily log's summary view has exact counts; the summary file is the
+    # fallback for students (or deployments) without a daily log.
+    current = pinned(LOG_FILE)
+    log_file = None
+    if current is not None:
+        log_file, refreshing = precompute.serving(LOG_FILE, current)
+        if log_file is None:
+            st.info("⏳ Refreshing attendance summaries…")
+            precompute.wait(current)
+            st.rerun()
+        if refreshing:
+            st.caption("⏳ Refreshing daily log summaries…")
+    record = None
+    if log_file is not None:
+        with span('student.summary_view'):
+            record = load_summary_view(log_file).student(username)
+
+    what_if, scenario = None, projection.Scenario()
+    if record is not None:
+        attended_classes = int(record['Attended'].sum())
+        total_classes = int(record['Held'].sum())
+        percent = attended_classes / total_classes * 100 if total_classes else 0.0
+        subject_df = pd.DataFrame({'Subject': record['Subject'], 'Attendance': record['Percent'].round(2)})
+        with span('student.projection'):
+            what_if = projection.project_students([username], list(record['Subject']), record['Attended'],
+                                                  record['Held'], scenario)
+    else:
+        found = _summary_file_record(username)
+        if found is None:
+            return
+        percent, total_classes, attended_classes, subject_df = found
 
     # ===========================================
     # 🧾 Redesigned Attendance Card Section
@@ -74,10 +146,6 @@ def student_dashboard(username):
         unsafe_allow_html=True
     )
 
-    percent = student['Percent'].values[0] if 'Percent' in df.columns else None
-    total_classes = student['Total'].values[0] if 'Total' in df.columns else None
-    attended_classes = (percent / 100) * total_classes if (percent is not None and total_classes is not None) else None
-
     st.markdown(
         f"""
         <div class="attendance-card">
@@ -126,9 +194,12 @@ def student_dashboard(username):
         if percent < 75 and total_classes is not None:
             st.error("⚠️ You are at risk of DETENTION!")
             required_percent = 75
-            if attended_classes is not None:
-                needed_classes = (required_percent/100 * total_classes - attended_classes) / (1 - required_percent/100)
-                needed_classes = int(np.ceil(max(0, needed_classes)))
+            needed_classes = None
+            if what_if is not None:
+                needed_classes = int(what_if['Classes_Needed'].iloc[-1])    # the Overall row
+            elif attended_classes is not None:
+                needed_classes = int(classes_needed(attended_classes, total_classes, required_percent))
+            if needed_classes is not None:
                 st.info(f"📅 You need to attend **{needed_classes}** more consecutive classes to reach 75%.")
         else:
             st.success("✅ You are maintaining safe attendance.")
@@ -139,29 +210,43 @@ def student_dashboard(username):
     # 📊 Subject-wise Chart
     # ===========================================
     st.subheader("📊 Subject-wise Attendance Comparison")
-    exclude_cols = ['Sl.No', 'Roll.No', 'Total', 'Percent']
-    subject_cols = [col for col in df.columns if col not in exclude_cols]
+    if subject_df is not None:
+        with span('student.subject_chart', rows=len(subject_df)):
+            fig = px.bar(
+                subject_df,
+                x='Subject',
+                y='Attendance',
+                text='Attendance',
+                color='Attendance',
+                color_continuous_scale='Bluered',
+                labels={'Attendance': 'Marks / Percentage'},
+                title="Subject-wise Attendance Performance"
+            )
+            fig.update_traces(textposition='outside')
+            fig.update_layout(xaxis_tickangle=-45, yaxis_range=[0, 100])
 
-    if subject_cols:
-        subject_data = student[subject_cols].select_dtypes(include=[np.number]).iloc[0]
-        subject_df = pd.DataFrame({
-            'Subject': subject_data.index,
-            'Attendance': subject_data.values
-        })
-
-        fig = px.bar(
-            subject_df,
-            x='Subject',
-            y='Attendance',
-            text='Attendance',
-            color='Attendance',
-            color_continuous_scale='Bluered',
-            labels={'Attendance': 'Marks / Percentage'},
-            title="Subject-wise Attendance Performance"
-        )
-        fig.update_traces(textposition='outside')
-        fig.update_layout(xaxis_tickangle=-45, yaxis_range=[0, 100])
-
-        st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(fig, use_container_width=True)
     else:
         st.warning("No numeric subject columns found in CSV.")
+
+    # ===========================================
+    # 📒 Daily Log (Faculty Records)
+    # ===========================================
+    if record is not None:
+        st.subheader("📒 Subject-wise Attendance from Daily Log")
+        st.dataframe(record.round(2), use_container_width=True, hide_index=True)
+
+        with span('student.forecast') as s:
+            forecast_students, _ = load_forecast(log_file)
+            s.rows = len(forecast_students)
+        forecast_row = forecast_students[forecast_students['Roll.No'] == str(username)]
+        if not forecast_row.empty:
+            st.caption(f"🔮 Projected end-of-term attendance: {forecast_row['Projected_Percent'].iloc[0]:.1f}% "
+                       f"· detention probability {forecast_row['Detention_Probability'].iloc[0]:.0%}")
+
+        st.subheader("🧮 What If")
+        st.caption(f"Classes you can still miss, or must attend, to stay at {scenario.threshold}% "
+                   f"by the end of a {scenario.term_days}-day term.")
+        st.dataframe(what_if[['Subject', 'Percent', 'Classes_Needed', 'Safe_Bunks', 'Remaining',
+                              'Must_Attend', 'Can_Miss', 'Projected_Percent']].round(2),
+                     use_container_width=True, hide_index=True)
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The app modules are imported flat (as `streamlit run main.py` does).
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
@@ -0,0 +1,179 @@
+"""
+The cube reductions against the row-wise pandas code they replaced
+(`apply(lambda x: (x == 'P').sum(), axis=1)` + `groupby('Roll.No')`).
+
+The reference drops duplicate (Date, Roll.No) rows (the cube keeps the last
+one) and counts a class as held when anyone has a mark for it, so on a log
+without blanks or duplicates it is exactly the old faculty summary.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from absence_index import build_absence_index
+from aggregation import (DETENTION_THRESHOLD, cube_from_columnar, cube_from_frame, date_summary,
+                         student_subject_summary, student_summary, subject_summary)
+from columnar import encode_frame
+from running_totals import RunningTotals
+
+BUNDLED_LOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'data', 'faculty_attendance_20days.csv')
+
+
+def bundled_log():
+    df = pd.read_csv(BUNDLED_LOG)
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def blanks_and_duplicates():
+    return pd.DataFrame([
+        ('2025-10-01', 'R1', 'P', 'A', 'P'),
+        ('2025-10-01', 'R2', 'A', None, 'P'),
+        ('2025-10-02', 'R1', 'P', 'P', None),
+        ('2025-10-02', 'R2', 'P', 'P', None),     # IDS not held on 10-02
+        ('2025-10-02', 'R1', 'A', 'P', None),     # replaces R1's first 10-02 row
+        ('2025-10-03', 'R3', 'P', 'A', 'A'),
+    ], columns=['Date', 'Roll.No', 'ML', 'DV', 'IDS'])
+
+
+def across_month_boundary():
+    # Label order (01-10 < 30-09) differs from calendar order.
+    return pd.DataFrame([
+        ('30-09-2025', 'R1', 'A', 'P'),
+        ('30-09-2025', 'R2', 'P', 'P'),
+        ('01-10-2025', 'R1', 'P', 'A'),
+        ('01-10-2025', 'R2', 'A', 'A'),
+    ], columns=['Date', 'Roll.No', 'ML', 'DV'])
+
+
+FRAMES = {
+    'bundled_log': bundled_log,
+    'blanks_and_duplicates': blanks_and_duplicates,
+    'across_month_boundary': across_month_boundary,
+}
+
+
+@pytest.fixture(params=sorted(FRAMES))
+def log(request):
+    return FRAMES[request.param]()
+
+
+# ================================
+# pandas reference
+# ================================
+def reference(df):
+    df = df.drop_duplicates(['Date', 'Roll.No'], keep='last').copy()
+    df['Roll.No'] = df['Roll.No'].astype(str)
+    df['Date'] = df['Date'].astype(str)
+    subjects = [c for c in df.columns if c not in ('Date', 'Roll.No')]
+    df['Classes_Attended'] = df[subjects].apply(lambda x: (x == 'P').sum(), axis=1)
+    held = df.groupby('Date')[subjects].apply(lambda g: g.notna().any())    # dates x subjects
+    return df, subjects, held
+
+
+def reference_student_summary(df):
+    df, _, held = reference(df)
+    total = held.to_numpy().sum()
+    summary = df.groupby('Roll.No')['Classes_Attended'].sum().reset_index()
+    summary['Percent'] = (summary['Classes_Attended'] / total) * 100
+    summary['Detained'] = (summary['Percent'] < DETENTION_THRESHOLD).astype(int)
+    return summary
+
+
+def assert_same(actual, expected):
+    pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected.reset_index(drop=True),
+                                  check_dtype=False)
+
+
+# ================================
+# Reductions
+# ================================
+def test_student_summary(log):
+    assert_same(student_summary(cube_from_frame(log)), reference_student_summary(log))
+
+
+def test_student_summary_matches_old_faculty_code_on_bundled_log():
+    df = bundled_log()
+    subject_cols = [c for c in df.columns if c not in ('Date', 'Roll.No')]
+    df['Classes_Attended'] = df[subject_cols].apply(lambda x: (x == 'P').sum(), axis=1)
+    total_classes = len(subject_cols) * df['Date'].nunique()
+    old = df.groupby('Roll.No')['Classes_Attended'].sum().reset_index()
+    old['Percent'] = (old['Classes_Attended'] / total_classes) * 100
+    old['Detained'] = (old['Percent'] < 75).astype(int)
+
+    assert_same(student_summary(cube_from_frame(bundled_log())), old)
+
+
+def test_subject_summary(log):
+    df, subjects, held = reference(log)
+    attended = np.array([(df[s] == 'P').sum() for s in subjects])
+    total = df['Roll.No'].nunique() * held.sum(axis=0).to_numpy()
+    expected = pd.DataFrame({
+        'Subject': subjects,
+        'Classes_Attended': attended,
+        'Percent': attended / total * 100,
+    })
+    assert_same(subject_summary(cube_from_frame(log)), expected)
+
+
+def test_date_summary(log):
+    df, _, held = reference(log)
+    expected = df.groupby('Date')['Classes_Attended'].sum().reset_index()
+    expected['Percent'] = expected['Classes_Attended'] / (df['Roll.No'].nunique() * held.sum(axis=1).to_numpy()) * 100
+    assert_same(date_summary(cube_from_frame(log)), expected)
+
+
+def test_student_subject_summary(log):
+    df, subjects, held = reference(log)
+    attended = df.groupby('Roll.No')[subjects].agg(lambda x: (x == 'P').sum())
+    long = attended.stack().rename('Attended').reset_index()
+    long.columns = ['Roll.No', 'Subject', 'Attended']
+    long['Held'] = long['Subject'].map(held.sum(axis=0))
+    long['Percent'] = long['Attended'] / long['Held'] * 100
+    long['Detained'] = (long['Percent'] < DETENTION_THRESHOLD).astype(int)
+    assert_same(student_subject_summary(cube_from_frame(log)), long)
+
+
+def test_running_totals_match_cube(log):
+    totals = RunningTotals.from_frame(log).to_frame()
+    summary = student_summary(cube_from_frame(log))
+    assert list(totals['Roll.No']) == list(summary['Roll.No'])
+    assert list(totals['Attended']) == list(summary['Classes_Attended'])
+    np.testing.assert_allclose(totals['Percent'], summary['Percent'])
+
+
+# ================================
+# Cube builders
+# ================================
+def test_columnar_cube_equals_frame_cube(log):
+    from_frame = cube_from_frame(log)
+    from_columnar = cube_from_columnar(encode_frame(log))
+
+    assert list(from_columnar.rolls) == list(from_frame.rolls)
+    assert list(from_columnar.dates) == list(from_frame.dates)
+    assert from_columnar.subjects == from_frame.subjects
+    np.testing.assert_array_equal(from_columnar.present, from_frame.present)
+    np.testing.assert_array_equal(from_columnar.recorded, from_frame.recorded)
+
+
+def test_absentees_across_month_boundary():
+    df = across_month_boundary()
+    for cube in (cube_from_frame(df), cube_from_columnar(encode_frame(df))):
+        index = build_absence_index(cube)
+        assert list(index.absentees('30-09-2025', 'ML')) == ['R1']
+        assert list(index.absentees('01-10-2025', 'DV')) == ['R1', 'R2']
+        assert list(index.student_absences('R1')['Date']) == ['30-09-2025', '01-10-2025']
+
+
+def test_columnar_reads_day_first_dates():
+    # Month-first, 01-10-2025 would be 10 January and 13-10-2025 no date at all.
+    df = pd.DataFrame([
+        ('01-10-2025', 'R1', 'P'),
+        ('13-10-2025', 'R1', 'A'),
+    ], columns=['Date', 'Roll.No', 'ML'])
+    log = encode_frame(df)
+    assert log is not None
+    assert list(log.date_days.astype('datetime64[D]').astype(str)) == ['2025-10-01', '2025-10-13']
@@ -0,0 +1,265 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from columnar import date_reading, read_dates
+from running_totals import RunningTotals
+
+# ================================
+# Chunked, Validated Uploads
+# ================================
+# Faculty uploads are parsed CHUNK_ROWS rows at a time. Each chunk is checked
+# against the daily log schema (Date, Roll.No, then P/A/blank subject columns)
+# and its good rows are written straight to a temporary file next to the log,
+# which is renamed over the log only once the whole upload has been read. A
+# reader therefore sees either the old file or the new one, never a mix.
+#
+# How dates are read (month- or day-first) is decided once, from the first
+# chunk, so every chunk of an upload is read the same way. A (Date, Roll.No)
+# may appear only once per upload; repeats are bad rows, so what is written
+# never holds two marks for one student on one day.
+
+CHUNK_ROWS = 100_000
+REPORT_LIMIT = 100          # bad rows kept (with reasons) for the report
+KEY_COLUMNS = ['Date', 'Roll.No']
+STATUS_VALUES = {'P', 'A'}
+
+
+class UploadError(ValueError):
+    """The upload was rejected; the live file was not touched."""
+
+    def __init__(self, message, report=None):
+        super().__init__(message)
+        self.report = report
+
+
+def _temp_beside(path):
+    directory = os.path.dirname(os.path.abspath(path))
+    return tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.upload', dir=directory)
+
+
+def _publish(tmp, path):
+    mode = os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644
+    os.chmod(tmp, mode)
+    os.replace(tmp, path)
+
+
+def _discard(tmp):
+    try:
+        os.unlink(tmp)
+    except OSError:
+        pass
+
+
+def atomic_write_csv(df: pd.DataFrame, path):
+    """`df.to_csv(path, index=False)`, but readers never see a half-written file."""
+    fd, tmp = _temp_beside(path)
+    try:
+        with os.fdopen(fd, 'w', newline='') as out:
+            df.to_csv(out, index=False)
+        _publish(tmp, path)
+    except BaseException:
+        _discard(tmp)
+        raise
+
+
+def _rewind(source):
+    if hasattr(source, 'seek'):
+        try:
+            source.seek(0)
+        except Exception:
+            pass
+
+
+def check_columns(columns, expected=None) -> list:
+    """Stripped subject columns of an upload header; raises UploadError if the schema is wrong."""
+    columns = [str(c).strip() for c in columns]
+    if len(set(columns)) != len(columns):
+        dupes = sorted({c for c in columns if columns.count(c) > 1})
+        raise UploadError(f"Duplicate columns in upload: {dupes}.")
+    missing = [c for c in KEY_COLUMNS if c not in columns]
+    if missing:
+        raise UploadError(f"Upload is missing required columns: {missing}.")
+    subjects = [c for c in columns if c not in KEY_COLUMNS]
+    if not subjects:
+        raise UploadError("Upload has no subject columns.")
+    if expected is not None and set(columns) != set(expected):
+        raise UploadError(
+            f"Uploaded columns don't match the attendance log "
+            f"(missing: {sorted(set(expected) - set(columns)) or 'none'}, "
+            f"unexpected: {sorted(set(columns) - set(expected)) or 'none'})."
+        )
+    return subjects
+
+
+class UploadKeys:
+    """
+    (Date, Roll.No) keys of the rows accepted so far in one upload, kept as
+    sorted 64-bit hashes (8 bytes a row) so repeats across chunks are caught.
+    """
+
+    def __init__(self):
+        self.hashes = np.zeros(0, dtype=np.uint64)
+
+    @staticmethod
+    def _hash(keys: pd.DataFrame) -> np.ndarray:
+        return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+    def repeats(self, keys: pd.DataFrame) -> np.ndarray:
+        """True for rows whose key was accepted before or comes earlier in `keys`."""
+        h = self._hash(keys)
+        i = np.minimum(np.searchsorted(self.hashes, h), max(len(self.hashes) - 1, 0))
+        seen = self.hashes[i] == h if len(self.hashes) else np.zeros(len(h), dtype=bool)
+        return seen | pd.Series(h).duplicated().to_numpy()
+
+    def add(self, keys: pd.DataFrame):
+        self.hashes = np.sort(np.concatenate([self.hashes, self._hash(keys)]), kind='stable')
+
+
+def upload_reading(chunk: pd.DataFrame):
+    """How to read the dates of an upload, decided from its first chunk (see `columnar.date_reading`)."""
+    return date_reading(chunk['Date'].str.strip())
+
+
+def validate_chunk(chunk: pd.DataFrame, subjects, first_row: int, reading=None, keys=None):
+    """
+    Split a chunk (all columns read as str) into valid rows and a list of problems.
+
+    Dates are read with `reading` (see `upload_reading`), by default the one
+    that fits this chunk. Rows repeating an earlier (Date, Roll.No) are bad;
+    `keys` (an UploadKeys) carries the keys of earlier chunks and is given
+    this chunk's valid ones.
+
+    Returns:
+        (good rows with stripped keys and statuses, list of
+        {'row', 'Roll.No', 'reason'} dicts; `row` counts data rows from 1)
+    """
+    chunk = chunk.copy()
+    for col in KEY_COLUMNS + list(subjects):
+        chunk[col] = chunk[col].str.strip()
+    reasons = pd.Series('', index=chunk.index)
+
+    dates = read_dates(chunk['Date'], reading or date_reading(chunk['Date']))
+    reasons[dates.isna()] += 'bad Date; '
+    reasons[chunk['Roll.No'].isna() | (chunk['Roll.No'] == '')] += 'missing Roll.No; '
+    for subject in subjects:
+        values = chunk[subject].mask(chunk[subject] == '')
+        chunk[subject] = values
+        bad = values.notna() & ~values.isin(STATUS_VALUES)
+        reasons[bad] += f'{subject} not P/A; '
+    keys = keys if keys is not None else UploadKeys()
+    reasons[keys.repeats(chunk[KEY_COLUMNS])] += 'repeats an earlier Date/Roll.No; '
+
+    is_bad = reasons != ''
+    keys.add(chunk.loc[~is_bad, KEY_COLUMNS])
+    problems = [
+        {'row': first_row + int(pos), 'Roll.No': roll, 'reason': reason.rstrip('; ')}
+        for pos, roll, reason in zip(
+            (is_bad.to_numpy()).nonzero()[0], chunk.loc[is_bad, 'Roll.No'], reasons[is_bad])
+    ]
+    return chunk[~is_bad], problems
+
+
+def _chunks(source, chunk_rows):
+    _rewind(source)
+    try:
+        reader = pd.read_csv(source, dtype=str, chunksize=chunk_rows, skipinitialspace=True)
+        first_row = 1
+        for chunk in reader:
+            chunk.columns = chunk.columns.astype(str).str.strip()
+            yield first_row, chunk
+            first_row += len(chunk)
+    except pd.errors.EmptyDataError:
+        return
+    except pd.errors.ParserError as e:
+        raise UploadError(f"Upload is not a readable CSV: {e}") from e
+
+
+def _new_report():
+    return {'rows': 0, 'written': 0, 'bad_rows': 0, 'problems': []}
+
+
+def _note_problems(report, problems):
+    report['bad_rows'] += len(problems)
+    room = REPORT_LIMIT - len(report['problems'])
+    if room > 0:
+        report['problems'].extend(problems[:room])
+
+
+def _reject_if_bad(report, skip_bad_rows):
+    if report['bad_rows'] and not skip_bad_rows:
+        raise UploadError(f"{report['bad_rows']} invalid rows in upload; nothing was saved.", report)
+
+
+def read_upload(source, expected_columns=None, skip_bad_rows: bool = False,
+                chunk_rows: int = CHUNK_ROWS):
+    """
+    Parse and validate a (small) upload into one frame, e.g. for `append_days`.
+
+    Returns:
+        (DataFrame of valid rows, report dict with `rows`, `written`,
+        `bad_rows` and the first REPORT_LIMIT `problems`)
+    """
+    report = _new_report()
+    good, subjects, keys = [], None, UploadKeys()
+    for first_row, chunk in _chunks(source, chunk_rows):
+        if subjects is None:
+            subjects = check_columns(chunk.columns, expected_columns)
+            reading = upload_reading(chunk)
+        rows, problems = validate_chunk(chunk, subjects, first_row, reading, keys)
+        report['rows'] += len(chunk)
+        _note_problems(report, problems)
+        good.append(rows)
+    if subjects is None:
+        raise UploadError("Upload is empty.")
+    _reject_if_bad(report, skip_bad_rows)
+    df = pd.concat(good, ignore_index=True)
+    report['written'] = len(df)
+    return df, report
+
+
+def stream_replace(source, data_file, skip_bad_rows: bool = False,
+                   chunk_rows: int = CHUNK_ROWS) -> dict:
+    """
+    Replace the daily log at `data_file` with a validated upload, chunk by chunk.
+
+    Memory stays at about one chunk. Running totals are counted along the way;
+    the columnar sidecar and forecast model are left stale and rebuilt by
+    their loaders on first use.
+
+    Raises:
+        UploadError: bad schema, an empty upload, or invalid rows without
+            `skip_bad_rows`. The live file is left as it was.
+
+    Returns:
+        Report dict as from `read_upload`.
+    """
+    report = _new_report()
+    fd, tmp = _temp_beside(data_file)
+    try:
+        totals, columns, keys = None, None, UploadKeys()
+        with os.fdopen(fd, 'w', newline='') as out:
+            for first_row, chunk in _chunks(source, chunk_rows):
+                if columns is None:
+                    subjects = check_columns(chunk.columns)
+                    columns = list(chunk.columns)
+                    totals = RunningTotals(subjects)
+                    reading = upload_reading(chunk)
+                    out.write(','.join(columns) + '\n')
+                rows, problems = validate_chunk(chunk, subjects, first_row, reading, keys)
+                report['rows'] += len(chunk)
+                _note_problems(report, problems)
+                _reject_if_bad(report, skip_bad_rows)
+                rows.to_csv(out, header=False, index=False)
+                totals.add_rows(rows)
+                report['written'] += len(rows)
+        if columns is None:
+            raise UploadError("Upload is empty.")
+        _publish(tmp, data_file)
+    except BaseException:
+        _discard(tmp)
+        raise
+    totals.save(data_file)
+    return report
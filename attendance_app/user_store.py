@@ -0,0 +1,168 @@
+import logging
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+from snapshots import open_snapshots
+
+log = logging.getLogger(__name__)
+
+# ================================
+# User Stores
+# ================================
+# Both backends expose the same small interface used by helpers.check_login
+# and auth.register:
+#   get(username) -> {'username', 'password', 'role'} or None
+#   add(username, password_hash, role) -> False if the username is taken
+
+
+class CsvUserStore:
+    """
+    The original auth/users.csv file: full scan on lookup, full rewrite on insert.
+
+    Each insert publishes a new snapshot version (see snapshots.py), so a
+    concurrent login never reads a half-written file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self) -> pd.DataFrame:
+        current = open_snapshots(self.path).resolve()
+        if current is None:
+            return pd.DataFrame(columns=['username', 'password', 'role'])
+        return pd.read_csv(current, dtype=str)
+
+    def get(self, username):
+        df = self._read()
+        match = df[df['username'] == str(username)]
+        if match.empty:
+            return None
+        return match.iloc[0].to_dict()
+
+    def add(self, username, password_hash, role) -> bool:
+        with self._lock:
+            df = self._read()
+            if str(username) in df['username'].values:
+                return False
+            new_user = pd.DataFrame([[str(username), password_hash, role]], columns=['username', 'password', 'role'])
+            with open_snapshots(self.path).new_version() as path:
+                pd.concat([df, new_user], ignore_index=True).to_csv(path, index=False)
+            return True
+
+    def __len__(self):
+        return len(self._read())
+
+
+class SqliteUserStore:
+    """
+    Users in a local SQLite file (WAL mode) keyed by a primary-key index on username.
+
+    Lookups are a single index probe and registrations a single-row insert, so
+    concurrent registrations can't overwrite each other.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            " username TEXT PRIMARY KEY,"
+            " password TEXT NOT NULL,"
+            " role TEXT NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads; Streamlit runs
+        # each session's script in its own thread.
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, username):
+        row = self._conn().execute(
+            "SELECT username, password, role FROM users WHERE username = ?", (str(username),)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('username', 'password', 'role'), row))
+
+    def add(self, username, password_hash, role) -> bool:
+        conn = self._conn()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
+                    (str(username), password_hash, role),
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def migrate_from_csv(self, csv_path) -> int:
+        """
+        Copy every user from a users.csv file; existing usernames are kept.
+        Rows missing a username, password or role can't be stored and are
+        skipped (and logged). Returns rows inserted.
+        """
+        df = pd.read_csv(csv_path, dtype=str)
+        complete = df.dropna(subset=['username', 'password', 'role'])
+        if len(complete) < len(df):
+            log.warning("Skipped %d incomplete rows of %s (missing username, password or role).",
+                        len(df) - len(complete), csv_path)
+        df = complete
+        conn = self._conn()
+        with conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO users (username, password, role) VALUES (?, ?, ?)",
+                df[['username', 'password', 'role']].itertuples(index=False, name=None),
+            )
+            return conn.total_changes - before
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+
+# ================================
+# Store Selection
+# ================================
+BACKENDS = {'csv': CsvUserStore, 'sqlite': SqliteUserStore}
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_user_store(users_file, backend=None):
+    """
+    Return the process-wide user store for `users_file`.
+
+    The backend comes from `backend` or the ATTENDANCE_USER_STORE environment
+    variable (default 'sqlite'). The SQLite database lives next to the CSV
+    (auth/users.db) and is filled from the CSV once, while it is still empty.
+    """
+    backend = backend or os.environ.get('ATTENDANCE_USER_STORE', 'sqlite')
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown user store backend: {backend!r}")
+
+    key = (os.path.abspath(users_file), backend)
+    with _stores_lock:
+        if key not in _stores:
+            if backend == 'csv':
+                _stores[key] = CsvUserStore(users_file)
+            else:
+                db_path = os.path.splitext(users_file)[0] + '.db'
+                store = SqliteUserStore(db_path)
+                if len(store) == 0 and os.path.exists(users_file):
+                    store.migrate_from_csv(users_file)
+                _stores[key] = store
+        return _stores[key]